@@ -13,8 +13,16 @@ Use this to understand what your real trainer does, then mimic it!
 """
 
 import asyncio
+import json
 import logging
+import os
+import re
+import struct
+import sys
+import time
+from pathlib import Path
 from bleak import BleakScanner, BleakClient
+from bleak.assigned_numbers import AdvertisementDataType
 
 logging.basicConfig(
     level=logging.INFO,
@@ -27,199 +35,496 @@ FTMS_SERVICE = "00001826-0000-1000-8000-00805f9b34fb"
 INDOOR_BIKE_DATA = "00002ad2-0000-1000-8000-00805f9b34fb"
 CYCLING_POWER_SERVICE = "00001818-0000-1000-8000-00805f9b34fb"
 
+# Name fragments that suggest a device is a trainer
+TRAINER_KEYWORDS = ('trainer', 'kickr', 'neo', 'flux', 'direto',
+                    'elite', 'tacx', 'wahoo', 'saris', 'cycleops',
+                    'bike', 'smart', 'turbo')
 
-async def scan_for_trainers(duration=10):
-    """Scan for BLE devices and identify potential trainers"""
-    logger.info(f"Scanning for BLE devices for {duration} seconds...")
-    logger.info("Looking for devices with FTMS, Cycling Power, or trainer-like names\n")
+# Compiled once so each device name is matched in a single pass
+_TRAINER_NAME_RE = re.compile('|'.join(map(re.escape, TRAINER_KEYWORDS)))
+
+# Trainer services keyed by their 16-bit short UUID (chars 4:8 of the full UUID)
+_TRAINER_SERVICE_REASONS = {
+    FTMS_SERVICE[4:8]: "FTMS service",
+    CYCLING_POWER_SERVICE[4:8]: "Cycling Power service",
+}
+
+# BlueZ passive-scan filters: FTMS / Cycling Power as the first or second entry
+# of the advertised 16-bit service UUID list
+_PASSIVE_OR_PATTERNS = [
+    (position, ad_type, bytes.fromhex(short_uuid)[::-1])  # UUIDs are little-endian on air
+    for short_uuid in _TRAINER_SERVICE_REASONS
+    for ad_type in (AdvertisementDataType.COMPLETE_LIST_SERVICE_UUID16,
+                    AdvertisementDataType.INCOMPLETE_LIST_SERVICE_UUID16)
+    for position in (0, 2)
+]
+
+# Prebuilt structs for decoding Indoor Bike Data notifications
+_U16 = struct.Struct('<H')
+_I16 = struct.Struct('<h')
+
+# Notification printing in monitor: queued by the BLE callback, flushed in batches
+_NOTIFY_QUEUE_SIZE = 1024
+_NOTIFY_BATCH_SIZE = 64
+_NOTIFY_FLUSH_INTERVAL = 0.1  # seconds
+_NOTIFY_HEX_LIMIT = 32  # bytes of each notification shown as hex
+
+# On-disk cache of analyze results, one JSON file per device address
+GATT_CACHE_DIR = Path(os.environ.get('XDG_CACHE_HOME', Path.home() / '.cache')) / 'zwiffery' / 'gatt'
+GATT_CACHE_TTL = 24 * 60 * 60  # seconds
+
+# Characteristics whose value is fixed by the firmware (16-bit short UUIDs). Only these
+# are reused from the cache; all other readable characteristics are read on every connect
+_STATIC_CHAR_SHORT_UUIDS = frozenset({
+    '2a00', '2a01',  # Device Name, Appearance
+    '2a23', '2a24', '2a25', '2a26', '2a27', '2a28', '2a29', '2a2a', '2a50',  # Device Information
+    '2a5d', '2a65',  # Sensor Location, Cycling Power Feature
+    '2acc', '2ad4', '2ad5', '2ad6', '2ad8',  # Fitness Machine Feature and supported ranges
+})
+_BLUETOOTH_BASE_UUID_SUFFIX = '-0000-1000-8000-00805f9b34fb'
+
+
+def _passive_scanner_kwargs():
+    """BleakScanner arguments for a passive scan limited to trainer services"""
+    if sys.platform.startswith('linux'):
+        # BlueZ cannot filter passive scans by service UUID; it matches raw advertisement patterns
+        return {'scanning_mode': 'passive', 'bluez': {'or_patterns': _PASSIVE_OR_PATTERNS}}
+    if sys.platform == 'darwin':
+        # CoreBluetooth has no passive mode (bleak raises BleakError); keep the service filter
+        logger.warning("macOS does not support passive scanning - using an active scan "
+                       "limited to FTMS / Cycling Power devices")
+        return {'service_uuids': [FTMS_SERVICE, CYCLING_POWER_SERVICE]}
+    return {'scanning_mode': 'passive', 'service_uuids': [FTMS_SERVICE, CYCLING_POWER_SERVICE]}
+
+
+def _print_trainer(device, name, rssi, reasons, service_uuids):
+    """Print a device as soon as it is identified as a potential trainer"""
+    print(f"\n🚴 POTENTIAL TRAINER FOUND!")
+    print(f"   Name: {name or 'Unknown'}")
+    print(f"   Address: {device.address}")
+    print(f"   RSSI: {rssi} dBm")
+    print(f"   Reasons: {', '.join(reasons)}")
+    if service_uuids:
+        print(f"   Services: {sorted(service_uuids)}")
+
+
+async def scan_for_trainers(duration=10, passive=False):
+    """Scan for BLE devices and identify potential trainers
     
-    devices = await BleakScanner.discover(duration)
+    Advertisements are classified as they arrive, so trainers are printed
+    while the scan is still running.
     
-    trainers = []
+    With passive=True the scan sends no scan requests and the OS only reports
+    devices advertising the FTMS or Cycling Power service.
+    """
+    logger.info(f"Scanning for BLE devices for {duration} seconds...")
+    if passive:
+        logger.info("Passive scan: only devices advertising FTMS or Cycling Power will be reported\n")
+        scanner_kwargs = _passive_scanner_kwargs()
+    else:
+        logger.info("Looking for devices with FTMS, Cycling Power, or trainer-like names\n")
+        scanner_kwargs = {}
+    
+    trainers = {}  # address -> device
+    other_devices = {}  # address -> (device, name, rssi) for named devices that are not trainers
+    seen_uuids = {}  # address -> service UUIDs from all of its advertisements
     
     print("=" * 80)
     print("DISCOVERED DEVICES")
     print("=" * 80)
     
-    for device in devices:
-        is_trainer = False
+    def on_advertisement(device, adv_data):
+        """Classify each advertisement; print a trainer the first time it is recognised"""
+        if device.address in trainers:
+            return
+        
+        # Names and service lists can arrive in separate advertisements / scan responses
+        service_uuids = seen_uuids.setdefault(device.address, set())
+        service_uuids.update(adv_data.service_uuids)
+        name = device.name or adv_data.local_name
+        
         reasons = []
         
         # Check if it's a likely trainer based on name
-        if device.name:
-            name_lower = device.name.lower()
-            trainer_keywords = ['trainer', 'kickr', 'neo', 'flux', 'direto', 
-                              'elite', 'tacx', 'wahoo', 'saris', 'cycleops',
-                              'bike', 'smart', 'turbo']
-            
-            if any(keyword in name_lower for keyword in trainer_keywords):
-                is_trainer = True
-                reasons.append("trainer-like name")
+        if name and _TRAINER_NAME_RE.search(name.lower()):
+            reasons.append("trainer-like name")
         
-        # Check for FTMS service
-        if hasattr(device, 'metadata') and device.metadata and 'uuids' in device.metadata:
-            uuids = device.metadata['uuids']
-            if FTMS_SERVICE in uuids or '1826' in str(uuids):
-                is_trainer = True
-                reasons.append("FTMS service")
-            if CYCLING_POWER_SERVICE in uuids or '1818' in str(uuids):
-                is_trainer = True
-                reasons.append("Cycling Power service")
+        # Check for FTMS / Cycling Power services
+        short_uuids = frozenset(uuid[4:8].lower() for uuid in service_uuids)
+        for short_uuid, reason in _TRAINER_SERVICE_REASONS.items():
+            if short_uuid in short_uuids:
+                reasons.append(reason)
         
-        if is_trainer:
-            trainers.append(device)
-            print(f"\n🚴 POTENTIAL TRAINER FOUND!")
-            print(f"   Name: {device.name or 'Unknown'}")
-            print(f"   Address: {device.address}")
-            if hasattr(device, 'rssi'):
-                print(f"   RSSI: {device.rssi} dBm")
-            print(f"   Reasons: {', '.join(reasons)}")
-            if hasattr(device, 'metadata') and device.metadata and 'uuids' in device.metadata:
-                print(f"   Services: {device.metadata['uuids']}")
-        elif device.name:  # Show other named devices too
-            print(f"\n   Name: {device.name}")
-            print(f"   Address: {device.address}")
-            if hasattr(device, 'rssi'):
-                print(f"   RSSI: {device.rssi} dBm")
+        if reasons:
+            trainers[device.address] = device
+            other_devices.pop(device.address, None)
+            _print_trainer(device, name, adv_data.rssi, reasons, service_uuids)
+        elif name:  # Show other named devices too
+            other_devices[device.address] = (device, name, adv_data.rssi)
+    
+    async with BleakScanner(detection_callback=on_advertisement, **scanner_kwargs):
+        await asyncio.sleep(duration)
+    
+    for device, name, rssi in other_devices.values():
+        print(f"\n   Name: {name}")
+        print(f"   Address: {device.address}")
+        print(f"   RSSI: {rssi} dBm")
     
     print("\n" + "=" * 80)
     print(f"Found {len(trainers)} potential trainer(s)")
     print("=" * 80)
     
-    return trainers
+    return list(trainers.values())
 
 
-async def analyze_device(address):
-    """Connect to a device and analyze its services and characteristics"""
-    logger.info(f"\nConnecting to device: {address}")
+def _format_notification(char_uuid, data, verbose=False):
+    """Format one notification for printing, decoding it as Indoor Bike Data when possible
+    
+    Hex output is capped at _NOTIFY_HEX_LIMIT bytes; the byte list is only shown when verbose.
+    """
+    if len(data) > _NOTIFY_HEX_LIMIT:
+        hex_data = memoryview(data)[:_NOTIFY_HEX_LIMIT].hex() + '…'
+    else:
+        hex_data = data.hex()
+    lines = [
+        f"\n📨 Notification from {char_uuid}",
+        f"   Hex: {hex_data}",
+    ]
+    if verbose:
+        lines.append(f"   Bytes: {list(data)}")
+    lines.append(f"   Length: {len(data)} bytes")
+    
+    # Try to decode as Indoor Bike Data (length check covers every offset below)
+    if len(data) >= 8:
+        flags = _U16.unpack_from(data, 0)[0]
+        lines.append(f"   Flags: 0b{flags:016b}")
+        
+        # Check common flag bits
+        if flags & 0x0004:  # Instantaneous Cadence present
+            cadence = _U16.unpack_from(data, 2)[0] / 2
+            lines.append(f"   Cadence: {cadence} RPM")
+        
+        if flags & 0x0040:  # Instantaneous Power present
+            power = _I16.unpack_from(data, 4)[0]
+            lines.append(f"   Power: {power} W")
     
+    return "\n".join(lines) + "\n"
+
+
+def _gatt_cache_path(address):
+    """Cache file for a device address (colons are not allowed in Windows file names)"""
+    return GATT_CACHE_DIR / f"{address.replace(':', '-').upper()}.json"
+
+
+def _is_static_char(char_uuid):
+    """True for a standard characteristic whose value cannot change while the firmware stays the same"""
+    char_uuid = char_uuid.lower()
+    return char_uuid.endswith(_BLUETOOTH_BASE_UUID_SUFFIX) and char_uuid[4:8] in _STATIC_CHAR_SHORT_UUIDS
+
+
+def load_gatt_cache(address):
+    """Return the cached service list for a device, or None if missing or if any value
+    in it was read from the device more than GATT_CACHE_TTL ago"""
+    path = _gatt_cache_path(address)
     try:
-        async with BleakClient(address) as client:
-            logger.info(f"✓ Connected to {client.address}")
-            
-            print("\n" + "=" * 80)
-            print("DEVICE ANALYSIS")
-            print("=" * 80)
+        services = json.loads(path.read_text())
+        # Each value carries the time it was read (files without it count as expired)
+        read_times = [
+            char['read_at']
+            for service in services
+            for char in service['characteristics']
+            if char.get('value') is not None
+        ]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    if not read_times or time.time() - min(read_times) > GATT_CACHE_TTL:
+        return None
+    return services
+
+
+def save_gatt_cache(address, services):
+    """Write a service list to the device's cache file (failures are only logged)"""
+    path = _gatt_cache_path(address)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(services, indent=2))
+    except OSError as e:
+        logger.warning(f"Could not write GATT cache {path}: {e}")
+
+
+def print_analysis(services):
+    """Print a service list as built by TrainerSession.analyze"""
+    print("\n" + "=" * 80)
+    print("DEVICE ANALYSIS")
+    print("=" * 80)
+    
+    # Get all services
+    for service in services:
+        print(f"\n📦 Service: {service['uuid']}")
+        print(f"   Description: {service['description']}")
+        
+        # Get all characteristics
+        for char in service['characteristics']:
+            print(f"\n   📋 Characteristic: {char['uuid']}")
+            print(f"      Description: {char['description']}")
+            print(f"      Properties: {char['properties']}")
             
-            # Get all services
-            for service in client.services:
-                print(f"\n📦 Service: {service.uuid}")
-                print(f"   Description: {service.description}")
+            # Show value if readable
+            if char.get('value') is not None:
+                value = bytes.fromhex(char['value'])
+                print(f"      Value (hex): {value.hex()}")
+                print(f"      Value (bytes): {list(value)}")
                 
-                # Get all characteristics
-                for char in service.characteristics:
-                    print(f"\n   📋 Characteristic: {char.uuid}")
-                    print(f"      Description: {char.description}")
-                    print(f"      Properties: {char.properties}")
-                    
-                    # Try to read value if readable
-                    if "read" in char.properties:
-                        try:
-                            value = await client.read_gatt_char(char.uuid)
-                            print(f"      Value (hex): {value.hex()}")
-                            print(f"      Value (bytes): {list(value)}")
-                            
-                            # Try to decode as string
-                            try:
-                                decoded = value.decode('utf-8')
-                                print(f"      Value (string): {decoded}")
-                            except:
-                                pass
-                        except Exception as e:
-                            print(f"      Could not read: {e}")
-                    
-                    # Show if it supports notify/indicate
-                    if "notify" in char.properties:
-                        print(f"      ⚡ Supports NOTIFY (will broadcast data)")
-                    if "indicate" in char.properties:
-                        print(f"      ⚡ Supports INDICATE (will send data with ACK)")
-            
-            print("\n" + "=" * 80)
-            print("ANALYSIS COMPLETE")
-            print("=" * 80)
+                # Try to decode as string
+                try:
+                    decoded = value.decode('utf-8')
+                    print(f"      Value (string): {decoded}")
+                except:
+                    pass
+            elif char.get('error') is not None:
+                print(f"      Could not read: {char['error']}")
             
-    except Exception as e:
-        logger.error(f"Error analyzing device: {e}")
+            # Show if it supports notify/indicate
+            if "notify" in char['properties']:
+                print(f"      ⚡ Supports NOTIFY (will broadcast data)")
+            if "indicate" in char['properties']:
+                print(f"      ⚡ Supports INDICATE (will send data with ACK)")
+    
+    print("\n" + "=" * 80)
+    print("ANALYSIS COMPLETE")
+    print("=" * 80)
 
 
-async def monitor_device(address, duration=30):
-    """Connect and monitor notifications from a device"""
-    logger.info(f"\nConnecting to device: {address}")
-    logger.info(f"Monitoring for {duration} seconds...\n")
+class TrainerSession:
+    """One BLE connection to a device, shared by analysis and monitoring
+    
+    Services and characteristics are discovered once on connect and cached,
+    so running several operations does not repeat GATT discovery.
+    """
+    
+    def __init__(self, address):
+        self.address = address
+        self._client = BleakClient(address)
+        self._services = []
+    
+    async def __aenter__(self):
+        logger.info(f"\nConnecting to device: {self.address}")
+        await self._client.connect()
+        logger.info(f"✓ Connected to {self._client.address}")
+        
+        # Snapshot the discovered GATT tree once for every later operation
+        self._services = list(self._client.services)
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._client.disconnect()
     
-    notifications_received = {}
+    def _iter_chars(self):
+        """Yield every cached characteristic (including ones sharing a UUID)"""
+        for service in self._services:
+            yield from service.characteristics
+    
+    async def _read_char(self, char, gatt_lock):
+        """Read a characteristic straight from the device, returning (value, error)"""
+        async with gatt_lock:
+            try:
+                # WinRT and CoreBluetooth already default to use_cached=False in bleak 0.19,
+                # so every backend queries the device rather than an OS-side cache
+                return await self._client.read_gatt_char(char), None
+            except Exception as e:
+                return None, e
     
-    def notification_handler(sender, data):
-        """Handle incoming notifications"""
-        char_uuid = str(sender.uuid) if hasattr(sender, 'uuid') else str(sender)
+    async def analyze(self, cached=None):
+        """Read every readable characteristic and print the GATT tree
         
-        if char_uuid not in notifications_received:
-            notifications_received[char_uuid] = 0
-        notifications_received[char_uuid] += 1
+        Values of static characteristics (see _STATIC_CHAR_SHORT_UUIDS) are taken from
+        `cached` (a service list from load_gatt_cache) instead of being read again, as
+        long as the device's services and characteristics still match the cached ones.
+        Reused values keep their original read time. Returns the service list for
+        save_gatt_cache.
+        """
+        # Handles only identify the same characteristic if the GATT layout is unchanged
+        # (a firmware update can add, remove or move services)
+        cached_values = {}
+        if cached is not None:
+            layout = [
+                (service.uuid, [(char.uuid, char.handle) for char in service.characteristics])
+                for service in self._services
+            ]
+            cached_layout = [
+                (service['uuid'], [(char['uuid'], char['handle']) for char in service['characteristics']])
+                for service in cached
+            ]
+            if layout == cached_layout:
+                cached_values = {
+                    char['handle']: (char['value'], char['read_at'])
+                    for service in cached
+                    for char in service['characteristics']
+                    if char.get('value') is not None and _is_static_char(char['uuid'])
+                }
+            else:
+                logger.info("GATT layout changed since the cached analysis - reading every characteristic")
         
-        print(f"\n📨 Notification from {char_uuid}")
-        print(f"   Hex: {data.hex()}")
-        print(f"   Bytes: {list(data)}")
-        print(f"   Length: {len(data)} bytes")
+        # Issue all reads up front; the lock keeps one request in flight on the GATT link
+        gatt_lock = asyncio.Semaphore(1)
+        readable = [
+            char for char in self._iter_chars()
+            if "read" in char.properties and char.handle not in cached_values
+        ]
+        results = await asyncio.gather(*(self._read_char(char, gatt_lock) for char in readable))
+        read_at = time.time()
+        read_results = {char.handle: result for char, result in zip(readable, results)}
         
-        # Try to decode as Indoor Bike Data
-        if len(data) >= 8:
-            try:
-                import struct
-                flags = struct.unpack('<H', data[0:2])[0]
-                print(f"   Flags: 0b{flags:016b}")
-                
-                # Check common flag bits
-                if flags & 0x0004:  # Instantaneous Cadence present
-                    if len(data) >= 4:
-                        cadence = struct.unpack('<H', data[2:4])[0] / 2
-                        print(f"   Cadence: {cadence} RPM")
-                
-                if flags & 0x0040:  # Instantaneous Power present
-                    if len(data) >= 6:
-                        power = struct.unpack('<h', data[4:6])[0]
-                        print(f"   Power: {power} W")
-            except:
-                pass
+        services = []
+        for service in self._services:
+            characteristics = []
+            for char in service.characteristics:
+                value, error = read_results.get(char.handle, (None, None))
+                value_read_at = None
+                if value is not None:
+                    value = bytes(value).hex()
+                    value_read_at = read_at
+                elif char.handle in cached_values:
+                    value, value_read_at = cached_values[char.handle]
+                characteristics.append({
+                    'uuid': char.uuid,
+                    'handle': char.handle,
+                    'description': char.description,
+                    'properties': list(char.properties),
+                    'value': value,
+                    'read_at': value_read_at,
+                    'error': None if error is None else str(error),
+                })
+            services.append({
+                'uuid': service.uuid,
+                'description': service.description,
+                'characteristics': characteristics,
+            })
+        
+        print_analysis(services)
+        return services
     
-    try:
-        async with BleakClient(address) as client:
-            logger.info(f"✓ Connected")
-            
-            # Subscribe to all notify characteristics
-            subscribed = 0
-            for service in client.services:
-                for char in service.characteristics:
-                    if "notify" in char.properties:
-                        try:
-                            await client.start_notify(char.uuid, notification_handler)
-                            logger.info(f"✓ Subscribed to {char.uuid}")
-                            subscribed += 1
-                        except Exception as e:
-                            logger.warning(f"Could not subscribe to {char.uuid}: {e}")
-            
-            if subscribed == 0:
-                logger.warning("No notify characteristics found!")
-                return
+    async def monitor(self, duration=30, verbose=False):
+        """Subscribe to every notify characteristic and print notifications for `duration` seconds"""
+        client = self._client
+        logger.info(f"Monitoring for {duration} seconds...\n")
+        
+        notifications_received = {}
+        dropped = 0
+        
+        # The BLE callback only queues raw data; formatting and printing happen in batches
+        pending = asyncio.Queue(maxsize=_NOTIFY_QUEUE_SIZE)
+        
+        def notification_handler(sender, data):
+            """Handle incoming notifications"""
+            nonlocal dropped
+            char_uuid = str(sender.uuid) if hasattr(sender, 'uuid') else str(sender)
             
-            logger.info(f"\n📡 Listening for notifications... (Press Ctrl+C to stop)\n")
+            if char_uuid not in notifications_received:
+                notifications_received[char_uuid] = 0
+            notifications_received[char_uuid] += 1
             
-            # Monitor for specified duration
+            try:
+                pending.put_nowait((char_uuid, data))
+            except asyncio.QueueFull:
+                dropped += 1
+        
+        def flush_pending(limit=None):
+            """Write up to `limit` queued notifications to stdout in one call"""
+            batch = []
+            while not pending.empty() and (limit is None or len(batch) < limit):
+                char_uuid, data = pending.get_nowait()
+                batch.append(_format_notification(char_uuid, data, verbose=verbose))
+            if batch:
+                sys.stdout.write(''.join(batch))
+                sys.stdout.flush()
+        
+        async def drain_notifications():
+            """Print queued notifications every _NOTIFY_FLUSH_INTERVAL seconds"""
+            while True:
+                await asyncio.sleep(_NOTIFY_FLUSH_INTERVAL)
+                flush_pending(limit=_NOTIFY_BATCH_SIZE)
+        
+        # Subscribe to all notify characteristics
+        subscribed = 0
+        for char in self._iter_chars():
+            if "notify" in char.properties:
+                try:
+                    await client.start_notify(char, notification_handler)
+                    logger.info(f"✓ Subscribed to {char.uuid}")
+                    subscribed += 1
+                except Exception as e:
+                    logger.warning(f"Could not subscribe to {char.uuid}: {e}")
+        
+        if subscribed == 0:
+            logger.warning("No notify characteristics found!")
+            return
+        
+        logger.info(f"\n📡 Listening for notifications... (Press Ctrl+C to stop)\n")
+        
+        # Monitor for specified duration
+        drain_task = asyncio.create_task(drain_notifications())
+        try:
             await asyncio.sleep(duration)
-            
-            print("\n" + "=" * 80)
-            print("MONITORING SUMMARY")
-            print("=" * 80)
-            for char_uuid, count in notifications_received.items():
-                print(f"{char_uuid}: {count} notifications")
-            print("=" * 80)
-            
+        finally:
+            drain_task.cancel()
+            flush_pending()
+        
+        print("\n" + "=" * 80)
+        print("MONITORING SUMMARY")
+        print("=" * 80)
+        for char_uuid, count in notifications_received.items():
+            print(f"{char_uuid}: {count} notifications")
+        if dropped:
+            print(f"({dropped} notifications not printed - output could not keep up)")
+        print("=" * 80)
+
+
+async def analyze_device(address, fresh=False):
+    """Connect to a device and analyze its services and characteristics
+    
+    Static characteristic values from a cache younger than GATT_CACHE_TTL are reused
+    unless fresh=True; everything else is read from the device again.
+    """
+    cached = None if fresh else load_gatt_cache(address)
+    if cached is not None:
+        logger.info(f"Reusing static values from {_gatt_cache_path(address)} (use --fresh to re-read them)")
+    
+    try:
+        async with TrainerSession(address) as session:
+            save_gatt_cache(address, await session.analyze(cached=cached))
+    except Exception as e:
+        logger.error(f"Error analyzing device: {e}")
+
+
+async def monitor_device(address, duration=30, verbose=False):
+    """Connect and monitor notifications from a device"""
+    try:
+        async with TrainerSession(address) as session:
+            await session.monitor(duration=duration, verbose=verbose)
     except KeyboardInterrupt:
         logger.info("\n\nStopped by user")
     except Exception as e:
         logger.error(f"Error monitoring device: {e}")
 
 
+async def analyze_and_monitor_device(address, duration=30, verbose=False, fresh=False):
+    """Analyze a device, then monitor its notifications over the same connection
+    
+    Static characteristic values from a fresh-enough cache are reused unless fresh=True;
+    everything else is read from the device again.
+    """
+    cached = None if fresh else load_gatt_cache(address)
+    try:
+        async with TrainerSession(address) as session:
+            save_gatt_cache(address, await session.analyze(cached=cached))
+            await session.monitor(duration=duration, verbose=verbose)
+    except KeyboardInterrupt:
+        logger.info("\n\nStopped by user")
+    except Exception as e:
+        logger.error(f"Error analyzing/monitoring device: {e}")
+
+
 async def main():
     """Main entry point"""
     import argparse
@@ -232,23 +537,39 @@ Examples:
   # Scan for trainers
   python3 analyze_trainer.py scan
   
-  # Analyze a specific device
+  # Passive scan that only reports FTMS / Cycling Power devices
+  python3 analyze_trainer.py scan --passive
+  
+  # Analyze a specific device (static values are cached for 24 hours)
   python3 analyze_trainer.py analyze AA:BB:CC:DD:EE:FF
   
+  # Analyze again, re-reading the static values too
+  python3 analyze_trainer.py analyze AA:BB:CC:DD:EE:FF --fresh
+  
   # Monitor notifications from device
   python3 analyze_trainer.py monitor AA:BB:CC:DD:EE:FF
   
   # Monitor for 60 seconds
   python3 analyze_trainer.py monitor AA:BB:CC:DD:EE:FF --duration 60
+  
+  # Analyze, then monitor, over a single connection
+  python3 analyze_trainer.py analyze-and-monitor AA:BB:CC:DD:EE:FF
         """
     )
     
-    parser.add_argument('command', choices=['scan', 'analyze', 'monitor'],
+    parser.add_argument('command', choices=['scan', 'analyze', 'monitor', 'analyze-and-monitor'],
                        help='Command to run')
     parser.add_argument('address', nargs='?',
                        help='BLE device address (for analyze/monitor commands)')
     parser.add_argument('--duration', type=int, default=30,
                        help='Duration in seconds (default: 30)')
+    parser.add_argument('--passive', action='store_true',
+                       help='Passive scan that only reports FTMS/Cycling Power devices (scan command; '
+                            'macOS cannot scan passively and uses a filtered active scan)')
+    parser.add_argument('--verbose', action='store_true',
+                       help='Also print each notification as a list of byte values (monitor commands)')
+    parser.add_argument('--fresh', action='store_true',
+                       help='Re-read static characteristics instead of using cached values (analyze commands)')
     
     args = parser.parse_args()
     
@@ -258,7 +579,7 @@ Examples:
     print()
     
     if args.command == 'scan':
-        await scan_for_trainers(duration=args.duration)
+        await scan_for_trainers(duration=args.duration, passive=args.passive)
         print("\n💡 Tip: Use 'analyze' command with device address to see details")
         print("   Example: python3 analyze_trainer.py analyze AA:BB:CC:DD:EE:FF")
         
@@ -267,7 +588,7 @@ Examples:
             print("❌ Error: address required for analyze command")
             print("   Run 'scan' first to find device address")
             return
-        await analyze_device(args.address)
+        await analyze_device(args.address, fresh=args.fresh)
         print("\n💡 Tip: Use 'monitor' command to see live data")
         print("   Example: python3 analyze_trainer.py monitor AA:BB:CC:DD:EE:FF")
         
@@ -276,7 +597,15 @@ Examples:
             print("❌ Error: address required for monitor command")
             print("   Run 'scan' first to find device address")
             return
-        await monitor_device(args.address, duration=args.duration)
+        await monitor_device(args.address, duration=args.duration, verbose=args.verbose)
+        
+    elif args.command == 'analyze-and-monitor':
+        if not args.address:
+            print("❌ Error: address required for analyze-and-monitor command")
+            print("   Run 'scan' first to find device address")
+            return
+        await analyze_and_monitor_device(args.address, duration=args.duration,
+                                         verbose=args.verbose, fresh=args.fresh)
 
 
 if __name__ == "__main__":
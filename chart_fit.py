@@ -3,60 +3,54 @@
 Create charts from .fit files showing speed, power, and altitude vs distance.
 """
 
-import json
 import sys
 import argparse
 from pathlib import Path
-import matplotlib.pyplot as plt
-import matplotlib
-from read_fit import read_fit_file, message_to_dict, extract_data_fields
+import numpy as np
+from read_fit import read_fit_columns
 
+# Long rides are reduced to this many points per series before plotting
+DOWNSAMPLE_THRESHOLD = 20000
+DOWNSAMPLE_POINTS = 4000
 
-def extract_record_data(json_data):
+# Renderer settings for long line series: merge near-collinear segments, draw in chunks
+_FAST_PATH_RCPARAMS = {
+    'path.simplify': True,
+    'path.simplify_threshold': 1.0,
+    'agg.path.chunksize': 10000,
+}
+
+# Opaque equivalents of blue/red/green at alpha 0.7 on white (avoids per-segment blending)
+_SPEED_COLOR = (0.3, 0.3, 1.0)
+_POWER_COLOR = (1.0, 0.3, 0.3)
+_ALTITUDE_COLOR = (0.3, 0.65, 0.3)
+
+
+def columns_to_chart_data(columns):
     """
-    Extract record messages and prepare data for charting.
+    Prepare record columns from read_fit_columns for charting.
     
     Args:
-        json_data: List of JSON objects from extract_data_fields
+        columns: Dictionary of record field name -> NumPy array
         
     Returns:
-        dict: Dictionary with lists of distance, speed, power, altitude
+        dict: Dictionary with NumPy arrays of distance, speed, power, altitude
+              (missing values are NaN, which matplotlib draws as gaps)
     """
-    records = [r for r in json_data if r.get('_message_type') == 'record']
-    
-    distances = []
-    speeds = []
-    powers = []
-    altitudes = []
-    
-    for record in records:
-        # Extract distance (in meters, convert to km for display)
-        distance = record.get('distance')
-        if distance is not None:
-            distances.append(distance / 1000.0)  # Convert to km
-        else:
-            continue  # Skip records without distance
-        
-        # Extract speed (in m/s, convert to km/h)
-        speed = record.get('speed') or record.get('enhanced_speed')
-        if speed is not None:
-            speeds.append(speed * 3.6)  # Convert m/s to km/h
-        else:
-            speeds.append(None)
-        
-        # Extract power (in watts)
-        power = record.get('power')
-        if power is not None and power > 0:  # Filter out zero/None power
-            powers.append(power)
-        else:
-            powers.append(None)
-        
-        # Extract altitude (in meters)
-        altitude = record.get('altitude') or record.get('enhanced_altitude')
-        if altitude is not None:
-            altitudes.append(altitude)
-        else:
-            altitudes.append(None)
+    # Skip records without distance
+    has_distance = ~np.isnan(columns['distance'])
+    
+    def pick(primary, fallback):
+        # Same as `record.get(primary) or record.get(fallback)`
+        primary = columns[primary][has_distance]
+        fallback = columns[fallback][has_distance]
+        return np.where(np.isnan(primary) | (primary == 0), fallback, primary)
+    
+    distances = columns['distance'][has_distance] * 1e-3  # Convert m to km
+    speeds = pick('speed', 'enhanced_speed') * 3.6  # Convert m/s to km/h
+    powers = columns['power'][has_distance]
+    powers = np.where(powers > 0, powers, np.nan)  # Filter out zero/missing power
+    altitudes = pick('altitude', 'enhanced_altitude')
     
     return {
         'distances': distances,
@@ -67,6 +61,40 @@ def extract_record_data(json_data):
     }
 
 
+def minmax_downsample(x, y, n_out=DOWNSAMPLE_POINTS):
+    """
+    Reduce a series to about n_out points, keeping the min and max of each bucket
+    so peaks and dips are still visible.
+    
+    Args:
+        x: NumPy array of x values
+        y: NumPy array of y values (may contain NaN)
+        n_out: Approximate number of points to keep
+        
+    Returns:
+        tuple: (x, y) downsampled arrays
+    """
+    n = len(x)
+    n_buckets = n_out // 2
+    if n <= n_out or n_buckets == 0:
+        return x, y
+    
+    bucket_size = -(-n // n_buckets)  # Ceiling division
+    padded = np.full(n_buckets * bucket_size, np.nan, dtype=np.float64)
+    padded[:n] = y
+    buckets = padded.reshape(n_buckets, bucket_size)
+    
+    # NaN never wins: treat it as +inf for the min and -inf for the max
+    nan_mask = np.isnan(buckets)
+    starts = np.arange(n_buckets) * bucket_size
+    mins = starts + np.argmin(np.where(nan_mask, np.inf, buckets), axis=1)
+    maxs = starts + np.argmax(np.where(nan_mask, -np.inf, buckets), axis=1)
+    
+    keep = np.unique(np.concatenate((mins, maxs)))
+    keep = keep[keep < n]
+    return x[keep], y[keep]
+
+
 def create_chart(data, output_path=None, show_plot=True):
     """
     Create a chart showing speed, power, and altitude vs distance.
@@ -81,30 +109,46 @@ def create_chart(data, output_path=None, show_plot=True):
     powers = data['powers']
     altitudes = data['altitudes']
     
-    if not distances:
+    if len(distances) == 0:
         print("Error: No record data with distance found", file=sys.stderr)
         return
     
+    # matplotlib is imported here so --help and FIT read errors don't pay for it;
+    # without a window to show, the Agg backend skips GUI toolkit startup
+    import matplotlib
+    if not show_plot:
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    
+    matplotlib.rcParams.update(_FAST_PATH_RCPARAMS)
+    
+    # Downsample very long rides - the chart cannot show more points than pixels anyway
+    speed_x, power_x, altitude_x = distances, distances, distances
+    if len(distances) > DOWNSAMPLE_THRESHOLD:
+        speed_x, speeds = minmax_downsample(distances, speeds)
+        power_x, powers = minmax_downsample(distances, powers)
+        altitude_x, altitudes = minmax_downsample(distances, altitudes)
+    
     # Create figure with subplots
     fig, (ax1, ax2, ax3) = plt.subplots(3, 1, figsize=(12, 10), sharex=True)
     fig.suptitle('Zwift Activity Data', fontsize=16, fontweight='bold')
     
     # Plot 1: Speed vs Distance
-    ax1.plot(distances, speeds, 'b-', linewidth=1.5, alpha=0.7, label='Speed')
+    ax1.plot(speed_x, speeds, '-', color=_SPEED_COLOR, linewidth=1.5, label='Speed')
     ax1.set_ylabel('Speed (km/h)', fontsize=12)
     ax1.set_title('Speed vs Distance', fontsize=14)
     ax1.grid(True, alpha=0.3)
     ax1.legend()
     
     # Plot 2: Power vs Distance
-    ax2.plot(distances, powers, 'r-', linewidth=1.5, alpha=0.7, label='Power')
+    ax2.plot(power_x, powers, '-', color=_POWER_COLOR, linewidth=1.5, label='Power')
     ax2.set_ylabel('Power (W)', fontsize=12)
     ax2.set_title('Power vs Distance', fontsize=14)
     ax2.grid(True, alpha=0.3)
     ax2.legend()
     
     # Plot 3: Altitude vs Distance
-    ax3.plot(distances, altitudes, 'g-', linewidth=1.5, alpha=0.7, label='Altitude')
+    ax3.plot(altitude_x, altitudes, '-', color=_ALTITUDE_COLOR, linewidth=1.5, label='Altitude')
     ax3.set_xlabel('Distance (km)', fontsize=12)
     ax3.set_ylabel('Altitude (m)', fontsize=12)
     ax3.set_title('Altitude vs Distance', fontsize=14)
@@ -169,20 +213,16 @@ def main():
         # If --no-show but no output, use default name
         output_path = fit_path.with_suffix(f'.{args.format}')
     
-    # Read and decode FIT file
+    # Read and decode FIT file straight into record columns
     print(f"Reading FIT file: {fit_path}", file=sys.stderr)
-    messages, errors = read_fit_file(fit_path)
+    columns, errors = read_fit_columns(fit_path)
     
     if errors:
         print(f"Warnings/Errors encountered: {errors}", file=sys.stderr)
     
-    # Extract data fields
-    print("Extracting data fields...", file=sys.stderr)
-    json_data = extract_data_fields(messages, debug=False)
-    
     # Extract record data
     print("Extracting record data...", file=sys.stderr)
-    chart_data = extract_record_data(json_data)
+    chart_data = columns_to_chart_data(columns)
     
     if chart_data['count'] == 0:
         print("Error: No record messages with distance data found in FIT file", file=sys.stderr)
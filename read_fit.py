@@ -7,9 +7,43 @@ Outputs an array of JSON objects representing data fields sorted by time.
 import json
 import sys
 import argparse
+from operator import itemgetter
 from pathlib import Path
+import numpy as np
 from garmin_fit_sdk import Decoder, Stream
 
+# orjson is much faster for large record dumps; fall back to stdlib json without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Message types that might contain time-series data
+# The Garmin FIT SDK uses names like 'record_mesgs', 'lap_mesgs', etc.
+DEFAULT_MESSAGE_TYPES = (
+    'record_mesgs',      # Time-series data (most common)
+    'record',            # Alternative name (for compatibility)
+    'lap_mesgs',         # Lap summaries
+    'session_mesgs',     # Session summaries
+    'activity_mesgs',    # Activity summaries
+    'event_mesgs',       # Events (start, stop, etc.)
+    'device_info_mesgs', # Device information
+    'hrv_mesgs',         # Heart rate variability
+    'hrv',               # Alternative name
+)
+
+# Just the time-series record messages
+RECORD_MESSAGE_TYPES = ('record_mesgs', 'record')
+
+# Record fields read by read_fit_columns by default (the ones chart_fit.py plots)
+RECORD_COLUMN_FIELDS = ('distance', 'speed', 'enhanced_speed', 'power', 'altitude', 'enhanced_altitude')
+
+# Field value types that are already JSON-serializable (checked by exact type)
+_JSON_SCALAR_TYPES = frozenset({int, float, str, bool, type(None)})
+
+# Fallback timestamp field names, in order of preference, for messages without 'timestamp'
+_ALT_TIMESTAMP_FIELDS = ('time', 'timestamp_1', 'timestamp_2', 'time_created', 'start_time', 'local_timestamp')
+
 
 def read_fit_file(fit_file_path):
     """
@@ -31,44 +65,104 @@ def read_fit_file(fit_file_path):
         sys.exit(1)
 
 
-def message_to_dict(msg, debug=False):
+def read_fit_columns(fit_file_path, fields=RECORD_COLUMN_FIELDS):
     """
-    Convert a FIT message object to a dictionary.
+    Read record messages from a FIT file straight into one NumPy array per field,
+    skipping the per-message dictionaries built by extract_data_fields.
     
     Args:
-        msg: FIT message object (can be dict, object with __dict__, or object with items())
-        debug: If True, print debug information
+        fit_file_path: Path to the .fit file
+        fields: Record field names to read
         
     Returns:
-        dict: Dictionary representation of the message
+        tuple: (dict of field name -> float32 array with NaN for missing values, errors list)
     """
-    msg_dict = {}
+    messages, errors = read_fit_file(fit_file_path)
     
-    # Handle different message formats
-    if hasattr(msg, 'items'):
-        items = msg.items()
-    elif hasattr(msg, '__dict__'):
-        items = msg.__dict__.items()
-    elif isinstance(msg, dict):
-        items = msg.items()
-    else:
-        if debug:
-            print(f"Warning: Unknown message type: {type(msg)}", file=sys.stderr)
-        return None
+    records = []
+    for message_type in RECORD_MESSAGE_TYPES:
+        records.extend(messages.get(message_type, ()))
+    
+    # One C-level conversion per field; NumPy turns missing (None) values into NaN
+    columns = {
+        field: np.array([record.get(field) for record in records], dtype=np.float32)
+        for field in fields
+    }
     
+    return columns, errors
+
+
+def _fields_to_dict(items):
+    """
+    Convert (field name, field value) pairs to a dictionary of JSON-serializable values.
+    
+    Args:
+        items: Iterable of (field_name, field_value) pairs
+        
+    Returns:
+        dict: Dictionary with converted field values
+    """
+    msg_dict = {}
     for field_name, field_value in items:
-        # Convert field values to JSON-serializable types
-        if hasattr(field_value, 'isoformat'):  # datetime objects
+        # Exact type check first - numbers and strings are by far the most common
+        if type(field_value) in _JSON_SCALAR_TYPES:
+            msg_dict[field_name] = field_value
+        elif hasattr(field_value, 'isoformat'):  # datetime objects
             msg_dict[field_name] = field_value.isoformat()
-        elif isinstance(field_value, (int, float, str, bool, type(None))):
+        elif isinstance(field_value, (int, float, str)):
             msg_dict[field_name] = field_value
         else:
             # Convert other types to string
             msg_dict[field_name] = str(field_value)
-    
     return msg_dict
 
 
+def _mapping_to_dict(msg):
+    """Convert a message exposing items() (the garmin_fit_sdk dict messages)"""
+    return _fields_to_dict(msg.items())
+
+
+def _attrs_to_dict(msg):
+    """Convert a message object that stores its fields as attributes"""
+    return _fields_to_dict(msg.__dict__.items())
+
+
+def _get_message_converter(msg):
+    """
+    Pick the converter function matching the shape of a FIT message.
+    
+    Args:
+        msg: FIT message object
+        
+    Returns:
+        function: Converter taking a message and returning a dict, or None if unsupported
+    """
+    if hasattr(msg, 'items'):
+        return _mapping_to_dict
+    if hasattr(msg, '__dict__'):
+        return _attrs_to_dict
+    return None
+
+
+def message_to_dict(msg, debug=False):
+    """
+    Convert a FIT message object to a dictionary.
+    
+    Args:
+        msg: FIT message object (can be dict, object with __dict__, or object with items())
+        debug: If True, print debug information
+        
+    Returns:
+        dict: Dictionary representation of the message
+    """
+    converter = _get_message_converter(msg)
+    if converter is None:
+        if debug:
+            print(f"Warning: Unknown message type: {type(msg)}", file=sys.stderr)
+        return None
+    return converter(msg)
+
+
 def extract_data_fields(messages, debug=False):
     """
     Extract data fields from FIT messages, focusing on record messages
@@ -88,22 +182,8 @@ def extract_data_fields(messages, debug=False):
         for msg_type, msg_list in messages.items():
             print(f"  {msg_type}: {len(msg_list)} messages", file=sys.stderr)
     
-    # Message types that might contain time-series data
-    # The Garmin FIT SDK uses names like 'record_mesgs', 'lap_mesgs', etc.
-    message_types_to_check = [
-        'record_mesgs',      # Time-series data (most common)
-        'record',            # Alternative name (for compatibility)
-        'lap_mesgs',         # Lap summaries
-        'session_mesgs',     # Session summaries
-        'activity_mesgs',    # Activity summaries
-        'event_mesgs',       # Events (start, stop, etc.)
-        'device_info_mesgs', # Device information
-        'hrv_mesgs',         # Heart rate variability
-        'hrv',               # Alternative name
-    ]
-    
     # Process each message type
-    for message_type in message_types_to_check:
+    for message_type in DEFAULT_MESSAGE_TYPES:
         if message_type not in messages:
             continue
         
@@ -111,25 +191,35 @@ def extract_data_fields(messages, debug=False):
         if debug:
             print(f"Processing {message_type}: {len(msg_list)} messages", file=sys.stderr)
         
+        # Short type name (e.g. 'record') shared by every message in this list
+        short_type = sys.intern(message_type.replace('_mesgs', ''))
+        
+        # Messages of one type share a shape, so pick the converter once per list
+        first_msg_class = type(msg_list[0]) if msg_list else None
+        converter = _get_message_converter(msg_list[0]) if msg_list else None
+        
         for msg in msg_list:
-            msg_dict = message_to_dict(msg, debug=debug)
+            if converter is not None and type(msg) is first_msg_class:
+                msg_dict = converter(msg)
+            else:
+                msg_dict = message_to_dict(msg, debug=debug)
             if msg_dict is None:
                 continue
             
-            # Look for timestamp in various possible field names
-            timestamp = None
-            timestamp_field = None
-            for ts_field in ['timestamp', 'time', 'timestamp_1', 'timestamp_2', 'time_created', 'start_time', 'local_timestamp']:
-                if ts_field in msg_dict:
-                    timestamp = msg_dict[ts_field]
-                    timestamp_field = ts_field
-                    # Normalize to 'timestamp' for consistency
-                    if ts_field != 'timestamp':
+            # Look for timestamp - 'timestamp' itself is present on almost every message
+            if 'timestamp' in msg_dict:
+                timestamp = msg_dict['timestamp']
+            else:
+                timestamp = None
+                for ts_field in _ALT_TIMESTAMP_FIELDS:
+                    if ts_field in msg_dict:
+                        timestamp = msg_dict[ts_field]
+                        # Normalize to 'timestamp' for consistency
                         msg_dict['timestamp'] = timestamp
-                    break
+                        break
             
             # Add message type to the dict for reference
-            msg_dict['_message_type'] = message_type.replace('_mesgs', '')
+            msg_dict['_message_type'] = short_type
             
             # If we found a timestamp, add the record
             if timestamp is not None:
@@ -150,25 +240,45 @@ def sort_by_time(json_data):
     Returns:
         list: Sorted list of dictionaries
     """
-    def get_timestamp(item):
+    # Single pass: compute each sort key once and set aside items without timestamps
+    keyed = []
+    items_without_timestamps = []
+    for item in json_data:
         timestamp = item.get('timestamp')
         if timestamp is None:
-            return None
-        # If timestamp is a string (ISO format), we can still sort it
-        # If it's a datetime object, convert to string for comparison
-        if hasattr(timestamp, 'isoformat'):
-            return timestamp.isoformat()
-        return str(timestamp)
-    
-    # Filter out items without timestamps and sort the rest
-    items_with_timestamps = [item for item in json_data if item.get('timestamp') is not None]
-    items_without_timestamps = [item for item in json_data if item.get('timestamp') is None]
+            items_without_timestamps.append(item)
+        elif hasattr(timestamp, 'isoformat'):
+            keyed.append((timestamp.isoformat(), item))
+        else:
+            # ISO strings from message_to_dict sort correctly as strings
+            keyed.append((str(timestamp), item))
     
-    # Sort by timestamp
-    items_with_timestamps.sort(key=get_timestamp)
+    # Stable sort on the precomputed key only
+    keyed.sort(key=itemgetter(0))
     
     # Return sorted items first, then items without timestamps
-    return items_with_timestamps + items_without_timestamps
+    return [item for _, item in keyed] + items_without_timestamps
+
+
+def dumps_json(data, pretty=False):
+    """
+    Serialize data to UTF-8 encoded JSON.
+    
+    Args:
+        data: JSON-serializable data (non-serializable values are converted with str)
+        pretty: If True, indent the output by 2 spaces
+        
+    Returns:
+        bytes: Encoded JSON document
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option, default=str)
+    
+    indent = 2 if pretty else None
+    return json.dumps(data, indent=indent, default=str, ensure_ascii=False).encode('utf-8')
 
 
 def main():
@@ -241,15 +351,16 @@ def main():
     sorted_data = sort_by_time(json_data)
     
     # Output JSON
-    indent = 2 if args.pretty else None
-    json_output = json.dumps(sorted_data, indent=indent, default=str, ensure_ascii=False)
+    json_output = dumps_json(sorted_data, pretty=args.pretty)
     
     if args.output:
         output_path = Path(args.output)
-        output_path.write_text(json_output, encoding='utf-8')
+        output_path.write_bytes(json_output)
         print(f"Output written to: {output_path}", file=sys.stderr)
     else:
-        print(json_output)
+        sys.stdout.flush()
+        sys.stdout.buffer.write(json_output + b'\n')
+        sys.stdout.buffer.flush()
 
 
 if __name__ == '__main__':
@@ -5,17 +5,26 @@ Emulates a smart trainer using FTMS (Fitness Machine Service) protocol
 """
 
 import asyncio
+import inspect
 import logging
+import os
 import struct
 import time
-import random
 import sys
 import threading
 import math
-from typing import Optional
-from scipy.optimize import fsolve
+from types import MappingProxyType
+from typing import Optional, Union
+import numpy as np
 from bless import BlessServer, BlessGATTCharacteristic, GATTCharacteristicProperties, GATTAttributePermissions
 
+# uvloop's libuv event loop has lower per-wakeup overhead for the notify loop;
+# fall back to the default asyncio loop without it
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -48,13 +57,360 @@ CYCLING_POWER_FEATURE_UUID = "00002a65-0000-1000-8000-00805f9b34fb"
 CYCLING_POWER_CONTROL_POINT_UUID = "00002a66-0000-1000-8000-00805f9b34fb"
 SENSOR_LOCATION_UUID = "00002a5d-0000-1000-8000-00805f9b34fb"
 
+# Fitness Machine Feature value - matches real Wahoo trainer: 034000000c600000
+# Fitness Machine Features (first uint32)
+FTMS_FEATURE_FLAGS = (
+    (1 << 0)      # Average Speed Supported
+    | (1 << 1)    # Cadence Supported
+    | (1 << 14)   # Power Measurement Supported
+)  # 0x00004003
+# Target Setting Features (second uint32)
+FTMS_TARGET_FLAGS = (
+    (1 << 2)      # Resistance Target Setting Supported
+    | (1 << 3)    # Power Target Setting Supported
+    | (1 << 13)   # Indoor Bike Simulation Parameters Supported
+    | (1 << 14)   # Wheel Circumference Configuration Supported
+)  # 0x0000600c
+FTMS_FEATURE_BYTES = struct.pack('<II', FTMS_FEATURE_FLAGS, FTMS_TARGET_FLAGS)
+
+# Highest power in watts accepted from commands and reported to Zwift
+MAX_POWER = 2000
+
+# Supported ranges as written on the wire (little-endian sint16 minimum, maximum, increment)
+RESISTANCE_RANGE_BYTES = b'\x00\x00\x64\x00\x01\x00'  # 0, 100, 1
+POWER_RANGE_BYTES = b'\x00\x00\xd0\x07\x01\x00'  # min 0W, max 2000W (MAX_POWER), 1W increments
+
+# Other static characteristic values (as reported by the real trainer where noted)
+TRAINING_STATUS_BYTES = b'\x00\x00'  # [0, 0] as per real trainer
+FITNESS_MACHINE_STATUS_BYTES = b'\x00'  # Status: Stopped
+CYCLING_POWER_FEATURE_BYTES = b'\x0e\x12'  # Real trainer value: 0e12 = [14, 18]
+SENSOR_LOCATION_BYTES = b'\x00'  # Real trainer value: 00 = [0] (Other)
+
+# Device Information Service strings
+MANUFACTURER_NAME = b"Zwiffery Labs"
+MODEL_NUMBER = b"Virtual Trainer v1.0"
+HARDWARE_REVISION = b"1"
+FIRMWARE_REVISION = b"1.0.0"
+SERIAL_NUMBER = b"ZWIF001"
+
+# GATT services, in registration order (FTMS first - most important for Zwift compatibility)
+GATT_SERVICES = (FTMS_SERVICE_UUID, CYCLING_POWER_SERVICE_UUID, DEVICE_INFO_SERVICE_UUID)
+
+_READ = GATTCharacteristicProperties.read
+_NOTIFY = GATTCharacteristicProperties.notify
+_WRITE_INDICATE = GATTCharacteristicProperties.write | GATTCharacteristicProperties.indicate
+_READABLE = GATTAttributePermissions.readable
+_WRITEABLE = GATTAttributePermissions.writeable
+
+# GATT characteristics as (service, characteristic, properties, initial value, permissions),
+# in registration order. Live data characteristics (value None, notify) get their first
+# encoded frame in setup_server; control points start out empty.
+GATT_CHARACTERISTICS = (
+    # Fitness Machine Service
+    (FTMS_SERVICE_UUID, FITNESS_MACHINE_FEATURE_UUID, _READ, FTMS_FEATURE_BYTES, _READABLE),
+    (FTMS_SERVICE_UUID, INDOOR_BIKE_DATA_UUID, _NOTIFY, None, _READABLE),
+    (FTMS_SERVICE_UUID, SUPPORTED_RESISTANCE_LEVEL_RANGE_UUID, _READ, RESISTANCE_RANGE_BYTES, _READABLE),
+    (FTMS_SERVICE_UUID, SUPPORTED_POWER_RANGE_UUID, _READ, POWER_RANGE_BYTES, _READABLE),
+    (FTMS_SERVICE_UUID, FITNESS_MACHINE_CONTROL_POINT_UUID, _WRITE_INDICATE, None, _WRITEABLE),
+    (FTMS_SERVICE_UUID, TRAINING_STATUS_UUID, _READ | _NOTIFY, TRAINING_STATUS_BYTES, _READABLE),
+    (FTMS_SERVICE_UUID, FITNESS_MACHINE_STATUS_UUID, _NOTIFY, FITNESS_MACHINE_STATUS_BYTES, _READABLE),
+    # Device Information Service
+    (DEVICE_INFO_SERVICE_UUID, MANUFACTURER_NAME_UUID, _READ, MANUFACTURER_NAME, _READABLE),
+    (DEVICE_INFO_SERVICE_UUID, MODEL_NUMBER_UUID, _READ, MODEL_NUMBER, _READABLE),
+    (DEVICE_INFO_SERVICE_UUID, HARDWARE_REVISION_UUID, _READ, HARDWARE_REVISION, _READABLE),
+    (DEVICE_INFO_SERVICE_UUID, FIRMWARE_REVISION_UUID, _READ, FIRMWARE_REVISION, _READABLE),
+    (DEVICE_INFO_SERVICE_UUID, SERIAL_NUMBER_UUID, _READ, SERIAL_NUMBER, _READABLE),
+    # Cycling Power Service
+    (CYCLING_POWER_SERVICE_UUID, CYCLING_POWER_MEASUREMENT_UUID, _NOTIFY, None, _READABLE),
+    (CYCLING_POWER_SERVICE_UUID, CYCLING_POWER_FEATURE_UUID, _READ, CYCLING_POWER_FEATURE_BYTES, _READABLE),
+    (CYCLING_POWER_SERVICE_UUID, CYCLING_POWER_CONTROL_POINT_UUID, _WRITE_INDICATE, None, _WRITEABLE),
+    (CYCLING_POWER_SERVICE_UUID, SENSOR_LOCATION_UUID, _READ, SENSOR_LOCATION_BYTES, _READABLE),
+)
+
+# Notification flags (see the encoders for the bit meanings)
+INDOOR_BIKE_DATA_FLAGS = 0b0000010001000100  # Instantaneous Cadence (bit 2) + Instantaneous Power (bit 6)
+CYCLING_POWER_MEASUREMENT_FLAGS = 0b0000000000000000  # No optional fields, just power
+
+# Precompiled struct formats for the notification and control point hot paths.
+# The notification buffers start with their constant flags, so only the fields
+# after them (offset 2) are packed on each update
+_FLAGS_STRUCT = struct.Struct('<H')
+_BIKE_DATA_STRUCT = struct.Struct('<HHh')  # speed, cadence, power
+_CYCLING_POWER_STRUCT = struct.Struct('<h')  # power
+_CP_RESP_STRUCT = struct.Struct('<BBB')  # response code, request opcode, result
+_SINT8 = struct.Struct('<b')
+_SINT16 = struct.Struct('<h')
+_SIM_STRUCT = struct.Struct('<hhBB')  # wind speed, grade, crr, cw
+
+# Bound once so the encoders call them without the Struct attribute lookup
+_pack_bike_data_into = _BIKE_DATA_STRUCT.pack_into
+_pack_cycling_power_into = _CYCLING_POWER_STRUCT.pack_into
+
+# Seconds between data notifications (1 Hz is typical for trainers)
+UPDATE_INTERVAL = 1.0
+
+# Identical data frames are not re-sent, except at least this often (seconds) so Zwift
+# does not treat the trainer as disconnected
+NOTIFY_KEEPALIVE = 2.0
+
+# Number of uniform noise samples generated per RNG call in simulate_realistic_data
+NOISE_BUFFER_SIZE = 1024
+
+# Number of (grade, wind) speed tables kept by _speed_for_power
+SPEED_LUT_CACHE_SIZE = 64
+
+# Newton's method limits for the steady-state speed solver (speeds in m/s)
+SPEED_SOLVER_MAX_ITER = 50
+SPEED_SOLVER_TOLERANCE = 1e-9
+
+# Scheduled update ticks kept in the telemetry history (10 minutes at 1 Hz), and its columns.
+# Extra ticks run early for control point writes are not recorded, so a row is one UPDATE_INTERVAL
+HISTORY_SIZE = 600
+HISTORY_COLUMNS = ('power', 'cadence', 'speed', 'grade', 'wind')
+
+
+def _clamp(value, lo, hi):
+    """Limit value to [lo, hi] with plain comparisons (cheaper than nested min/max calls)"""
+    return lo if value < lo else (hi if value > hi else value)
+
+
+def _solve_speed(power: float, grade: float, wind: float, v_guess: float,
+                 rho: float, cda: float, crr: float, mass: float) -> Optional[float]:
+    """Solve the steady-state power equation for velocity with Newton's method
+    
+    Physics equation: power = (aerodynamic + rolling + gravitational) * velocity,
+    i.e. f(v) = A*(v + wind)^2*v + B*v - power = 0 with A = 0.5*rho*CdA and
+    B = m*g*(Crr*cos(theta) + sin(theta)), where theta = atan(grade / 100).
+    
+    f''(v) = A*(6v + 4*wind), so f is concave left of v = -2*wind/3 and convex right
+    of it. On descents (B < 0) and in tailwinds (wind < 0) f can have a local maximum
+    and minimum and up to three roots, and plain Newton would return whichever one
+    the guess happens to lead to. The iteration therefore starts on the monotone
+    stretch that holds the largest root: right of the local minimum if f <= 0 there,
+    otherwise left of the local maximum. f keeps one sign of curvature on that
+    stretch, so the iterates stay on it and converge to that root. With no wind the
+    equation is a depressed cubic and is solved in closed form instead.
+    
+    Works on plain floats only (the trainer passes in its physical constants).
+    
+    Returns:
+        Velocity in m/s, or None if the iteration did not converge
+    """
+    g = 9.81  # Gravitational acceleration (m/s²)
+    a = 0.5 * rho * cda
+    # cos(atan(x)) = 1/sqrt(1 + x²) and sin(atan(x)) = x/sqrt(1 + x²), so no trig is needed
+    rise = grade / 100.0  # tan(theta)
+    cos_theta = 1.0 / math.sqrt(1.0 + rise * rise)
+    b = mass * g * (crr + rise) * cos_theta
+    
+    if wind == 0.0 and power >= 0.0:
+        # Still air (what Zwift usually sends): solve the cubic in closed form
+        return _solve_speed_still_air(power, a, b)
+    
+    # f'(v) = A*(3v^2 + 4*wind*v + wind^2) + B is zero at inflection ± half_gap when disc > 0
+    inflection = -2.0 * wind / 3.0
+    disc = wind * wind - 3.0 * b / a
+    half_gap = math.sqrt(disc) / 3.0 if disc > 0.0 else 0.0
+    offset = max(half_gap, 1.0)  # Keeps the start point clear of f' = 0
+    v_min = inflection + half_gap  # Local minimum (the inflection point if f is monotone)
+    vw = v_min + wind
+    if a * vw * vw * v_min + b * v_min - power <= 0.0:
+        # Largest root is right of the local minimum, where f is increasing and convex
+        v = max(v_guess, v_min + offset)
+    else:
+        # f > 0 from the local maximum on, so the only root is left of it (increasing, concave)
+        v = inflection - half_gap - offset
+    
+    for _ in range(SPEED_SOLVER_MAX_ITER):
+        vw = v + wind
+        slope = a * vw * vw + 2.0 * a * vw * v + b
+        if slope <= 0.0:
+            # Only reachable at a double root, where Newton's method cannot finish
+            return None
+        step = (a * vw * vw * v + b * v - power) / slope
+        v -= step
+        if abs(step) < SPEED_SOLVER_TOLERANCE:
+            # Rounding can leave the v = 0 root (no power, uphill) a hair below zero
+            return 0.0 if abs(v) < SPEED_SOLVER_TOLERANCE else v
+    return None
+
+
+def _solve_speed_still_air(power: float, a: float, b: float) -> float:
+    """Closed-form steady-state velocity for a*v^3 + b*v - power = 0 (no wind), power >= 0
+    
+    Returns the largest real root, which is the one _solve_speed's Newton iteration
+    converges to: the only positive root when power > 0, and on a descent with no
+    power the terminal velocity sqrt(-b/a) rather than v = 0.
+    
+    Returns:
+        Velocity in m/s
+    """
+    if power == 0.0:
+        return math.sqrt(-b / a) if b < 0.0 else 0.0
+    
+    # Depressed cubic v^3 + p*v + q = 0 (Cardano)
+    p = b / a
+    q = -power / a
+    half_q = 0.5 * q
+    third_p = p / 3.0
+    disc = half_q * half_q + third_p * third_p * third_p
+    if disc >= 0.0:
+        # One real root
+        root = math.sqrt(disc)
+        u = -half_q + root
+        w = -half_q - root
+        v = math.copysign(abs(u) ** (1.0 / 3.0), u) + math.copysign(abs(w) ** (1.0 / 3.0), w)
+    else:
+        # Three real roots (steep descent, low power) - take the largest (trigonometric form)
+        r = math.sqrt(-third_p)
+        v = 2.0 * r * math.cos(math.acos(_clamp(-half_q / (r * r * r), -1.0, 1.0)) / 3.0)
+    
+    # One Newton step polishes the rounding left by the cube roots
+    slope = 3.0 * a * v * v + b
+    if slope > 0.0:
+        v -= (a * v * v * v + b * v - power) / slope
+    return v
+
+
+def _solve_speed_batch(power: np.ndarray, grade: np.ndarray, wind: np.ndarray, v_guess: np.ndarray,
+                       rho: float, cda: float, crr: float, mass: float) -> np.ndarray:
+    """Vectorized _solve_speed: the same Newton iteration run on whole arrays at once
+    
+    Returns:
+        Velocities in m/s, NaN where the iteration did not converge
+    """
+    g = 9.81  # Gravitational acceleration (m/s²)
+    a = 0.5 * rho * cda
+    rise = grade / 100.0  # tan(theta)
+    b = mass * g * (crr + rise) / np.sqrt(1.0 + rise * rise)
+    
+    # Start on the monotone stretch holding the largest root, as in _solve_speed
+    inflection = -2.0 * wind / 3.0
+    half_gap = np.sqrt(np.maximum(wind * wind - 3.0 * b / a, 0.0)) / 3.0
+    v_min = inflection + half_gap
+    vw = v_min + wind
+    v = np.where(a * vw * vw * v_min + b * v_min - power <= 0.0,
+                 np.maximum(v_guess, v_min + np.maximum(half_gap, 1.0)),
+                 inflection - half_gap - np.maximum(half_gap, 1.0))
+    
+    result = np.full(v.shape, np.nan)
+    active = np.ones(v.shape, dtype=bool)
+    for _ in range(SPEED_SOLVER_MAX_ITER):
+        vw = v + wind
+        slope = a * vw * vw + 2.0 * a * vw * v + b
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = (a * vw * vw * v + b * v - power) / slope
+        # Converged entries keep their value; the rest take a Newton step
+        # (a zero slope gives a NaN step, and the entry stays unconverged)
+        v = np.where(active, v - step, v)
+        converged = active & (np.abs(step) < SPEED_SOLVER_TOLERANCE)
+        result[converged] = v[converged]
+        active &= ~converged
+        if not active.any():
+            break
+    
+    # Same snap to the v = 0 root as _solve_speed (NaN compares False and stays NaN)
+    result[np.abs(result) < SPEED_SOLVER_TOLERANCE] = 0.0
+    return result
+
 
 class VirtualTrainer:
     """Virtual Smart Trainer that emulates FTMS protocol for Zwift"""
     
-    def __init__(self, name: str = "Zwiffery Trainer"):
+    # Fixed attribute layout (no per-instance __dict__); every attribute is set in __init__
+    __slots__ = (
+        # BLE server and cached characteristics
+        'name', 'server', '_server_update_value', '_bike_char', '_power_char', '_cp_char',
+        # Write and control point dispatch
+        '_write_handlers', '_cp_handlers', '_cp_responses',
+        # Notification buffers and unchanged-frame tracking
+        '_bike_buf', '_power_buf', '_last_sent',
+        # Event loop, tasks and keyboard input
+        '_loop', '_cp_queue', '_cp_worker_task', '_wake', '_quit', '_stdin_partial',
+        # Trainer state
+        'power', 'cadence', 'speed', 'heart_rate', 'target_resistance', 'current_resistance',
+        'is_running', 'base_power', 'base_cadence', 'cadence_variation',
+        'power_variance_level', 'power_variance_percent',
+        'erg_mode_enabled', 'target_power', 'current_grade', 'current_wind_speed',
+        'default_start_power', 'is_stopped',
+        # Super tuck
+        'is_super_tuck', 'pre_super_tuck_base_power', 'super_tuck_speed',
+        # Physics model and speed tables
+        'rider_weight', 'cda', 'crr', 'rho', '_speed_luts', '_speed_lut', '_speed_lut_key',
+        # Simulation noise
+        '_rng', '_noise_buf', '_noise_idx',
+        # Telemetry history
+        '_hist', '_hist_i', '_hist_count',
+    )
+    
+    # Power variance levels (as percentage of power)
+    VARIANCE_LEVELS = MappingProxyType({
+        'chill': 0.50,      # 15% variance
+        'focused': 0.10,    # 5% variance
+        'standard': 0.25,   # 10% variance (default)
+        'exact': 0.00        # 0% variance
+    })
+    
+    # Super tuck entry: speed >= 38mph (61.15 km/h) AND grade <= -8%
+    # Super tuck exit: speed < 38mph OR grade >= -3%
+    # This hysteresis prevents rapid toggling
+    super_tuck_speed_threshold = 70.0  # 43.5 mph in km/h
+    super_tuck_grade_threshold_entry = -8.0  # -8% grade to ENTER super tuck
+    super_tuck_grade_threshold_exit = -3.0  # -3% grade to EXIT super tuck (less strict)
+    
+    def __init__(self, name: str = "Zwiffery Trainer", seed: Optional[int] = None):
         self.name = name
         self.server: Optional[BlessServer] = None
+        self._server_update_value = None  # self.server.update_value, bound once in setup_server
+        
+        # Characteristics used on every update, looked up once in setup_server
+        self._bike_char: Optional[BlessGATTCharacteristic] = None
+        self._power_char: Optional[BlessGATTCharacteristic] = None
+        self._cp_char: Optional[BlessGATTCharacteristic] = None
+        
+        # Writable characteristic UUID (dashes removed, lowercase) -> handler.
+        # The FTMS and Cycling Power control points take the same commands.
+        # write_handler also adds the UUID spellings the backend uses.
+        self._write_handlers = {
+            FITNESS_MACHINE_CONTROL_POINT_UUID.lower().replace('-', ''): self._handle_control_point_command,
+            CYCLING_POWER_CONTROL_POINT_UUID.lower().replace('-', ''): self._handle_control_point_command,
+        }
+        
+        # Control point opcode -> handler
+        self._cp_handlers = {
+            0x00: self._cp_request_control,
+            0x01: self._cp_reset,
+            0x04: self._cp_set_resistance,
+            0x05: self._cp_set_target_power,
+            0x07: self._cp_start,
+            0x08: self._cp_stop,
+            0x11: self._cp_set_sim,
+        }
+        
+        # Reusable notification packets, repacked in place on every update
+        self._bike_buf = bytearray(_FLAGS_STRUCT.pack(INDOOR_BIKE_DATA_FLAGS) + bytes(_BIKE_DATA_STRUCT.size))
+        self._power_buf = bytearray(_FLAGS_STRUCT.pack(CYCLING_POWER_MEASUREMENT_FLAGS) + bytes(_CYCLING_POWER_STRUCT.size))
+        
+        # Packed control point responses by (opcode << 8 | result); they stay queued
+        # until sent, so each is an immutable bytes object that is built only once
+        self._cp_responses = {}
+        
+        # Last frame notified per characteristic UUID: (frame bytes, loop time sent)
+        self._last_sent = {}
+        
+        # Event loop the server runs on (write callbacks may arrive on another thread)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        
+        # Control point responses are queued by the write handler and sent by one worker task
+        self._cp_queue: Optional[asyncio.Queue] = None
+        self._cp_worker_task: Optional[asyncio.Task] = None
+        
+        # Set to send the next data update right away instead of at the next tick
+        self._wake: Optional[asyncio.Event] = None
+        
+        # Set by the 'quit' keyboard command
+        self._quit: Optional[asyncio.Event] = None
+        self._stdin_partial = b''  # Keyboard input received after the last newline
         
         # Trainer state
         self.power = 0  # Start at 0W - use 'u' command to set power
@@ -70,13 +426,6 @@ class VirtualTrainer:
         self.base_cadence = 85
         self.cadence_variation = 5
         
-        # Power variance levels (as percentage of power)
-        self.VARIANCE_LEVELS = {
-            'chill': 0.50,      # 15% variance
-            'focused': 0.10,    # 5% variance
-            'standard': 0.25,   # 10% variance (default)
-            'exact': 0.00        # 0% variance
-        }
         self.power_variance_level = 'standard'  # Default variance level
         self.power_variance_percent = self.VARIANCE_LEVELS['standard']
         
@@ -97,228 +446,109 @@ class VirtualTrainer:
         self.is_stopped = True  # Start stopped
         
         # Super tuck state - when True, rider is in super tuck (power/cadence = 0)
-        # Super tuck entry: speed >= 38mph (61.15 km/h) AND grade <= -8%
-        # Super tuck exit: speed < 38mph OR grade >= -3%
-        # This hysteresis prevents rapid toggling
+        # (entry and exit thresholds are the class constants above)
         self.is_super_tuck = False
-        self.super_tuck_speed_threshold = 70.0  # 43.5 mph in km/h
-        self.super_tuck_grade_threshold_entry = -8.0  # -8% grade to ENTER super tuck
-        self.super_tuck_grade_threshold_exit = -3.0  # -3% grade to EXIT super tuck (less strict)
         self.pre_super_tuck_base_power = 0  # Store power before super tuck to restore later
         self.super_tuck_speed = 0.0  # Speed when entering super tuck (maintained during super tuck)
         
         # Physics model parameters for speed calculation
+        # (call clear_speed_cache() after changing them on a running trainer)
         self.rider_weight = 80.0  # kg (rider + bike)
         self.cda = 0.3  # Coefficient of drag area (m²)
         self.crr = 0.004  # Coefficient of rolling resistance
         self.rho = 1.226  # Air density (kg/m³)
         
+        # Speed by whole watt for the current grade and wind, filled on demand.
+        # Tables for recently used (grade, wind) pairs are kept, so a route that
+        # goes back and forth between the same grades does not re-solve them
+        self._speed_luts = {}
+        self._speed_lut = None
+        self._speed_lut_key = None
+        self.clear_speed_cache()
+        
+        # Pre-generated noise for power/cadence variance (refilled when used up).
+        # A fixed seed makes the simulated ride repeatable, e.g. for benchmarking
+        self._rng = np.random.default_rng(seed)
+        self._noise_buf = None
+        self._noise_idx = 0
+        
+        # Ring buffer of recent scheduled ticks, one row per tick with HISTORY_COLUMNS.
+        # _hist_i is the row written next; float32 is plenty for telemetry
+        self._hist = np.zeros((HISTORY_SIZE, len(HISTORY_COLUMNS)), dtype=np.float32)
+        self._hist_i = 0
+        self._hist_count = 0
+        
     async def setup_server(self):
         """Initialize BLE GATT server"""
         logger.info(f"Setting up BLE server: {self.name}")
         
         # Create BLE server
         self.server = BlessServer(name=self.name, name_overwrite=True)
+        self._server_update_value = self.server.update_value
         
-        # Add FTMS Service FIRST (most important for Zwift compatibility)
-        await self.server.add_new_service(FTMS_SERVICE_UUID)
-        
-        # Fitness Machine Feature (indicates capabilities)
-        feature_bytes = self._encode_fitness_machine_features()
-        await self.server.add_new_characteristic(
-            FTMS_SERVICE_UUID,
-            FITNESS_MACHINE_FEATURE_UUID,
-            GATTCharacteristicProperties.read,
-            feature_bytes,
-            GATTAttributePermissions.readable
-        )
-        
-        # Indoor Bike Data (notifies power, cadence, speed)
-        # Initialize with default data (will be updated in the update loop)
-        initial_bike_data = self._encode_indoor_bike_data()
-        await self.server.add_new_characteristic(
-            FTMS_SERVICE_UUID,
-            INDOOR_BIKE_DATA_UUID,
-            GATTCharacteristicProperties.notify,
-            initial_bike_data,
-            GATTAttributePermissions.readable
-        )
-        
-        # Supported Resistance Level Range
-        resistance_range = struct.pack('<hhh', 0, 100, 1)  # min, max, increment
-        await self.server.add_new_characteristic(
-            FTMS_SERVICE_UUID,
-            SUPPORTED_RESISTANCE_LEVEL_RANGE_UUID,
-            GATTCharacteristicProperties.read,
-            resistance_range,
-            GATTAttributePermissions.readable
-        )
-        
-        # Supported Power Range
-        power_range = struct.pack('<hhh', 0, 2000, 1)  # min 0W, max 2000W, 1W increments
-        await self.server.add_new_characteristic(
-            FTMS_SERVICE_UUID,
-            SUPPORTED_POWER_RANGE_UUID,
-            GATTCharacteristicProperties.read,
-            power_range,
-            GATTAttributePermissions.readable
-        )
-        
-        # Fitness Machine Control Point (receives commands from Zwift)
-        await self.server.add_new_characteristic(
-            FTMS_SERVICE_UUID,
-            FITNESS_MACHINE_CONTROL_POINT_UUID,
-            GATTCharacteristicProperties.write | GATTCharacteristicProperties.indicate,
-            None,
-            GATTAttributePermissions.writeable
-        )
-        
-        # Training Status (read and notify)
-        training_status = bytes([0x00, 0x00])  # [0, 0] as per real trainer
-        await self.server.add_new_characteristic(
-            FTMS_SERVICE_UUID,
-            TRAINING_STATUS_UUID,
-            GATTCharacteristicProperties.read | GATTCharacteristicProperties.notify,
-            training_status,
-            GATTAttributePermissions.readable
-        )
-        
-        # Fitness Machine Status
-        # Initialize with default status (stopped, no error)
-        status_data = struct.pack('<B', 0x00)  # Status: Stopped
-        await self.server.add_new_characteristic(
-            FTMS_SERVICE_UUID,
-            FITNESS_MACHINE_STATUS_UUID,
-            GATTCharacteristicProperties.notify,
-            status_data,
-            GATTAttributePermissions.readable
-        )
-        
-        # Add Cycling Power Service
-        await self.server.add_new_service(CYCLING_POWER_SERVICE_UUID)
-        
-        # Add Device Information Service (add last, as it's less critical)
-        await self.server.add_new_service(DEVICE_INFO_SERVICE_UUID)
-        
-        # Manufacturer Name
-        await self.server.add_new_characteristic(
-            DEVICE_INFO_SERVICE_UUID,
-            MANUFACTURER_NAME_UUID,
-            GATTCharacteristicProperties.read,
-            b"Zwiffery Labs",
-            GATTAttributePermissions.readable
-        )
-        
-        # Model Number
-        await self.server.add_new_characteristic(
-            DEVICE_INFO_SERVICE_UUID,
-            MODEL_NUMBER_UUID,
-            GATTCharacteristicProperties.read,
-            b"Virtual Trainer v1.0",
-            GATTAttributePermissions.readable
-        )
-        
-        # Hardware Revision
-        await self.server.add_new_characteristic(
-            DEVICE_INFO_SERVICE_UUID,
-            HARDWARE_REVISION_UUID,
-            GATTCharacteristicProperties.read,
-            b"1",
-            GATTAttributePermissions.readable
-        )
-        
-        # Firmware Revision
-        await self.server.add_new_characteristic(
-            DEVICE_INFO_SERVICE_UUID,
-            FIRMWARE_REVISION_UUID,
-            GATTCharacteristicProperties.read,
-            b"1.0.0",
-            GATTAttributePermissions.readable
-        )
-        
-        # Serial Number
-        await self.server.add_new_characteristic(
-            DEVICE_INFO_SERVICE_UUID,
-            SERIAL_NUMBER_UUID,
-            GATTCharacteristicProperties.read,
-            b"ZWIF001",
-            GATTAttributePermissions.readable
-        )
-        
-        # Cycling Power Measurement (notify)
-        initial_power_data = self._encode_cycling_power_measurement()
-        await self.server.add_new_characteristic(
-            CYCLING_POWER_SERVICE_UUID,
-            CYCLING_POWER_MEASUREMENT_UUID,
-            GATTCharacteristicProperties.notify,
-            initial_power_data,
-            GATTAttributePermissions.readable
-        )
-        
-        # Cycling Power Feature (read)
-        # Real trainer value: 0e12 = [14, 18]
-        power_feature = bytes([0x0e, 0x12])
-        await self.server.add_new_characteristic(
-            CYCLING_POWER_SERVICE_UUID,
-            CYCLING_POWER_FEATURE_UUID,
-            GATTCharacteristicProperties.read,
-            power_feature,
-            GATTAttributePermissions.readable
-        )
-        
-        # Cycling Power Control Point (write, indicate)
-        await self.server.add_new_characteristic(
-            CYCLING_POWER_SERVICE_UUID,
-            CYCLING_POWER_CONTROL_POINT_UUID,
-            GATTCharacteristicProperties.write | GATTCharacteristicProperties.indicate,
-            None,
-            GATTAttributePermissions.writeable
-        )
+        # Live data characteristics start out with the current (all zero) frames
+        initial_values = {
+            INDOOR_BIKE_DATA_UUID: self._encode_indoor_bike_data(),
+            CYCLING_POWER_MEASUREMENT_UUID: self._encode_cycling_power_measurement(),
+        }
         
-        # Sensor Location (read)
-        # Real trainer value: 00 = [0] (Other)
-        sensor_location = bytes([0x00])
-        await self.server.add_new_characteristic(
-            CYCLING_POWER_SERVICE_UUID,
-            SENSOR_LOCATION_UUID,
-            GATTCharacteristicProperties.read,
-            sensor_location,
-            GATTAttributePermissions.readable
-        )
+        # Registered one at a time and in table order, which fixes the GATT layout Zwift sees
+        for service_uuid in GATT_SERVICES:
+            await self.server.add_new_service(service_uuid)
+        for service_uuid, char_uuid, properties, value, permissions in GATT_CHARACTERISTICS:
+            await self.server.add_new_characteristic(
+                service_uuid,
+                char_uuid,
+                properties,
+                initial_values.get(char_uuid, value),
+                permissions
+            )
+        
+        # Cache the characteristics written on the hot path (skips a UUID lookup per update)
+        self._bike_char = self.server.get_characteristic(INDOOR_BIKE_DATA_UUID)
+        self._power_char = self.server.get_characteristic(CYCLING_POWER_MEASUREMENT_UUID)
+        self._cp_char = self.server.get_characteristic(FITNESS_MACHINE_CONTROL_POINT_UUID)
+        # Checked once here, so update_loop can use them without a None check per tick
+        if self._bike_char is None or self._power_char is None or self._cp_char is None:
+            raise RuntimeError("BLE server is missing the bike data, power or control point characteristic")
         
         # Initialize control point characteristics with empty values
-        self.server.get_characteristic(FITNESS_MACHINE_CONTROL_POINT_UUID).value = bytearray()
+        self._cp_char.value = bytearray()
         self.server.get_characteristic(CYCLING_POWER_CONTROL_POINT_UUID).value = bytearray()
         
         # Set up write callback for all writable characteristics
         def write_handler(characteristic: BlessGATTCharacteristic, value: bytearray):
             """Handle write requests - route to appropriate handler based on characteristic UUID"""
-            char_uuid = str(characteristic.uuid).lower().replace('-', '')
-            # logger.info(f"Write to characteristic {char_uuid}: {value.hex()}")
+            raw_uuid = characteristic.uuid
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Write to characteristic %s: %s", raw_uuid, value.hex())
             
-            # Normalize UUIDs for comparison (remove dashes, lowercase)
-            ftms_cp_uuid = FITNESS_MACHINE_CONTROL_POINT_UUID.lower().replace('-', '')
-            cycling_cp_uuid = CYCLING_POWER_CONTROL_POINT_UUID.lower().replace('-', '')
-            
-            if char_uuid == ftms_cp_uuid:
-                # Handle FTMS control point commands
-                self._handle_control_point_command(value)
-            elif char_uuid == cycling_cp_uuid:
-                # Handle Cycling Power control point commands (similar to FTMS)
-                self._handle_control_point_command(value)
-            else:
-                logger.warning(f"Write to unknown characteristic: {char_uuid}")
+            # UUIDs as the backend reports them are added to the table on first use,
+            # so only the first write to each characteristic has to be normalized
+            handler = self._write_handlers.get(raw_uuid)
+            if handler is None:
+                # Normalize the UUID for lookup (remove dashes, lowercase)
+                char_uuid = str(raw_uuid).lower().replace('-', '')
+                handler = self._write_handlers.get(char_uuid)
+                if handler is None:
+                    logger.warning("Write to unknown characteristic: %s", char_uuid)
+                    return
+                self._write_handlers[raw_uuid] = handler
+            handler(value)
         
         # Set write callback for all writable characteristics
         self.server.write_request_func = write_handler
         
         # Set up read callbacks for all readable characteristics
-        def read_handler(characteristic: BlessGATTCharacteristic) -> bytes:
+        def read_handler(characteristic: BlessGATTCharacteristic) -> Union[bytes, bytearray]:
             """Handle read requests - return the current value of the characteristic"""
-            char_uuid = characteristic.uuid
-            char = self.server.get_characteristic(char_uuid)
-            if char and char.value is not None:
-                return bytes(char.value)
+            # bless passes the characteristic itself, so there is nothing to look up.
+            # Only the BlueZ value getter returns a copy; on WinRT it is the stored object,
+            # which for the data characteristics is the buffer the encoders repack every
+            # tick. A bytes() snapshot keeps the reply from changing under the backend.
+            value = characteristic.value
+            if value is not None:
+                return bytes(value)
             return b''
         
         # Set read callback for all readable characteristics
@@ -329,7 +559,7 @@ class VirtualTrainer:
             # Try to get services to verify they exist
             dev_info_char = self.server.get_characteristic(MANUFACTURER_NAME_UUID)
             ftms_char = self.server.get_characteristic(FITNESS_MACHINE_FEATURE_UUID)
-            power_char = self.server.get_characteristic(CYCLING_POWER_MEASUREMENT_UUID)
+            power_char = self._power_char
             
             logger.info("✓ Verified services are registered:")
             logger.info(f"  - Device Information Service: {DEVICE_INFO_SERVICE_UUID} ({len([c for c in [dev_info_char] if c])} characteristics)")
@@ -338,22 +568,21 @@ class VirtualTrainer:
         except Exception as e:
             logger.warning(f"Could not verify services: {e}")
         
-        logger.info("BLE GATT server setup complete")
-    
-    def _encode_fitness_machine_features(self) -> bytes:
-        """Encode Fitness Machine Feature characteristic
+        # Start the control point response worker
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._cp_queue = asyncio.Queue()
+        self._cp_worker_task = asyncio.create_task(self._cp_response_worker())
+        self._cp_worker_task.add_done_callback(self._on_cp_worker_done)
         
-        Matches real Wahoo trainer: 034000000c600000
-        Value: [3, 64, 0, 0, 12, 96, 0, 0]
-        """
-        # Real trainer value: 034000000c600000
-        # This is [3, 64, 0, 0, 12, 96, 0, 0] in little-endian
-        # Features: 0x00004003, Target Features: 0x0000600c
-        return bytes([0x03, 0x40, 0x00, 0x00, 0x0c, 0x60, 0x00, 0x00])
+        logger.info("BLE GATT server setup complete")
     
-    def _encode_indoor_bike_data(self) -> bytes:
+    def _encode_indoor_bike_data(self) -> bytearray:
         """Encode Indoor Bike Data characteristic for notifications
         
+        Packs into and returns the trainer's reusable buffer, so the result is
+        only valid until the next call (bless copies it in update_value).
+        
         Format (all little-endian):
         Flags (2 bytes)
         Instantaneous Speed (uint16, 0.01 km/h resolution) - optional
@@ -375,19 +604,23 @@ class VirtualTrainer:
         # Bit 11: Elapsed Time present
         # Bit 12: Remaining Time present
         
-        flags = 0b0000010001000100  # Instantaneous Cadence (bit 2) + Instantaneous Power (bit 6)
+        # INDOOR_BIKE_DATA_FLAGS: Instantaneous Cadence (bit 2) + Instantaneous Power (bit 6),
+        # already at the start of the buffer
         
         # Encode values
         speed_uint16 = int(self.speed * 100)  # Convert km/h to 0.01 km/h units
         cadence_uint16 = int(self.cadence * 2)  # Convert rpm to 0.5 rpm units
         power_sint16 = int(self.power)
         
-        data = struct.pack('<HHHh', flags, speed_uint16, cadence_uint16, power_sint16)
-        return data
+        _pack_bike_data_into(self._bike_buf, 2, speed_uint16, cadence_uint16, power_sint16)
+        return self._bike_buf
     
-    def _encode_cycling_power_measurement(self) -> bytes:
+    def _encode_cycling_power_measurement(self) -> bytearray:
         """Encode Cycling Power Measurement characteristic for notifications
         
+        Like _encode_indoor_bike_data, returns a reusable buffer that is only
+        valid until the next call.
+        
         Format (all little-endian):
         Flags (2 bytes)
         Instantaneous Power (sint16, 1 watt resolution)
@@ -408,18 +641,21 @@ class VirtualTrainer:
         # Bit 11: Accumulated Energy Present
         # Bit 12: Offset Compensation Indicator
         
-        # Simple flags: just instantaneous power
-        flags = 0b0000000000000000  # No optional fields, just power
+        # Simple flags: just instantaneous power (CYCLING_POWER_MEASUREMENT_FLAGS, already
+        # at the start of the buffer)
         
         # Encode instantaneous power (sint16, 1W resolution)
         power_sint16 = int(self.power)
         
-        data = struct.pack('<Hh', flags, power_sint16)
-        return data
+        _pack_cycling_power_into(self._power_buf, 2, power_sint16)
+        return self._power_buf
     
-    def _handle_control_point_command(self, data: bytearray):
+    def _handle_control_point_command(self, data: Union[bytes, bytearray, memoryview]):
         """Handle commands from Zwift via Fitness Machine Control Point
         
+        `data` may be any bytes-like object; it is viewed through a memoryview and
+        parameters are read with unpack_from, so no slices are copied.
+        
         OpCodes:
         0x00: Request Control
         0x01: Reset
@@ -431,84 +667,99 @@ class VirtualTrainer:
         0x08: Stop or Pause
         0x11: Set Indoor Bike Simulation Parameters
         """
+        data = memoryview(data)
         if len(data) == 0:
             return
         
         opcode = data[0]
         # logger.info(f"Control Point OpCode: 0x{opcode:02x}")
         
-        if opcode == 0x00:  # Request Control
-            logger.info("Zwift requested control")
-            self._send_control_point_response(opcode, 0x01)  # Success
-            
-        elif opcode == 0x01:  # Reset
-            logger.info("Zwift requested reset")
-            # Disable ERG mode on reset
-            self.erg_mode_enabled = False
-            self.target_power = 0
-            self.power = self.base_power
-            self.cadence = self.base_cadence
-            self._send_control_point_response(opcode, 0x01)
-            
-        elif opcode == 0x04:  # Set Target Resistance Level
-            if len(data) >= 2:
-                resistance = struct.unpack('<b', data[1:2])[0]
-                self.target_resistance = resistance
-                logger.info(f"Zwift set target resistance: {resistance}%")
-                self._send_control_point_response(opcode, 0x01)
-                
-        elif opcode == 0x05:  # Set Target Power (ERG mode)
-            if len(data) >= 3:
-                target_power = struct.unpack('<h', data[1:3])[0]
-                self.target_power = target_power
-                self.erg_mode_enabled = True
-                # Immediately override current power with target power (ERG mode takes precedence)
-                if target_power > 0:
-                    self.power = target_power
-                    # Clear base_power so it doesn't interfere with ERG mode
-                    self.base_power = 0
-                else:
-                    # Target power is 0, set power to 0
-                    self.power = 0
-                logger.info(f"Zwift set target power (ERG mode): {target_power}W (overriding current power)")
-                self._send_control_point_response(opcode, 0x01)
-                
-        elif opcode == 0x07:  # Start or Resume
-            logger.info("Zwift started workout")
-            self.is_running = True
-            self._send_control_point_response(opcode, 0x01)
-            
-        elif opcode == 0x08:  # Stop or Pause
-            logger.info("Zwift paused workout")
-            self.is_running = False
-            self._send_control_point_response(opcode, 0x01)
-            
-        elif opcode == 0x11:  # Set Indoor Bike Simulation Parameters
-            # This is sent during SIM mode (slope simulation)
-            # SIM mode disables ERG mode - trainer should respond to manual "u" commands
-            if self.erg_mode_enabled:
-                logger.info("SIM mode started - disabling ERG mode (trainer will respond to 'u' commands)")
-                self.erg_mode_enabled = False
-                self.target_power = 0
-            if len(data) >= 7:
-                wind_speed = struct.unpack('<h', data[1:3])[0]  # m/s * 1000
-                grade_raw = struct.unpack('<h', data[3:5])[0]  # percentage * 100
-                crr = struct.unpack('<B', data[5:6])[0]  # rolling resistance * 10000
-                cw = struct.unpack('<B', data[6:7])[0]  # wind resistance * 100
-                # Store raw grade as percentage (e.g., 4.78 for 4.78%)
-                raw_grade = grade_raw / 100.0
-                # Correct negative grades: Zwift sends negative gradients at ~50% of actual value
-                # So -8% in-game comes as -4% from Zwift - we need to double negative grades
-                self.current_grade = self._correct_grade(raw_grade)
-                # Store wind speed in m/s
-                self.current_wind_speed = wind_speed / 1000.0
-                logger.info(f"Zwift SIM mode - Raw Grade: {raw_grade:.2f}%, Corrected: {self.current_grade:.2f}%, Wind: {self.current_wind_speed:.2f}m/s")
-                # Grade and wind will be used in physics-based speed calculation
-                self._send_control_point_response(opcode, 0x01)
+        handler = self._cp_handlers.get(opcode)
+        if handler is not None:
+            handler(data)
         else:
-            logger.warning(f"Unknown control point opcode: 0x{opcode:02x}")
+            logger.warning("Unknown control point opcode: 0x%02x", opcode)
             self._send_control_point_response(opcode, 0x02)  # OpCode not supported
     
+    def _cp_request_control(self, data: memoryview):
+        """0x00: Request Control"""
+        logger.info("Zwift requested control")
+        self._send_control_point_response(0x00, 0x01)  # Success
+    
+    def _cp_reset(self, data: memoryview):
+        """0x01: Reset"""
+        logger.info("Zwift requested reset")
+        # Disable ERG mode on reset
+        self.erg_mode_enabled = False
+        self.target_power = 0
+        self.power = self.base_power
+        self.cadence = self.base_cadence
+        self._send_control_point_response(0x01, 0x01)
+    
+    def _cp_set_resistance(self, data: memoryview):
+        """0x04: Set Target Resistance Level"""
+        if len(data) >= 2:
+            resistance = _SINT8.unpack_from(data, 1)[0]
+            self.target_resistance = resistance
+            logger.info("Zwift set target resistance: %d%%", resistance)
+            self._send_control_point_response(0x04, 0x01)
+            self._request_update()
+    
+    def _cp_set_target_power(self, data: memoryview):
+        """0x05: Set Target Power (ERG mode)"""
+        if len(data) >= 3:
+            target_power = _SINT16.unpack_from(data, 1)[0]
+            self.target_power = target_power
+            self.erg_mode_enabled = True
+            # Immediately override current power with target power (ERG mode takes precedence)
+            if target_power > 0:
+                self.power = target_power
+                # Clear base_power so it doesn't interfere with ERG mode
+                self.base_power = 0
+            else:
+                # Target power is 0, set power to 0
+                self.power = 0
+            logger.info("Zwift set target power (ERG mode): %dW (overriding current power)", target_power)
+            self._send_control_point_response(0x05, 0x01)
+            self._request_update()
+    
+    def _cp_start(self, data: memoryview):
+        """0x07: Start or Resume"""
+        logger.info("Zwift started workout")
+        self.is_running = True
+        self._send_control_point_response(0x07, 0x01)
+    
+    def _cp_stop(self, data: memoryview):
+        """0x08: Stop or Pause"""
+        logger.info("Zwift paused workout")
+        self.is_running = False
+        self._send_control_point_response(0x08, 0x01)
+    
+    def _cp_set_sim(self, data: memoryview):
+        """0x11: Set Indoor Bike Simulation Parameters"""
+        # This is sent during SIM mode (slope simulation)
+        # SIM mode disables ERG mode - trainer should respond to manual "u" commands
+        if self.erg_mode_enabled:
+            logger.info("SIM mode started - disabling ERG mode (trainer will respond to 'u' commands)")
+            self.erg_mode_enabled = False
+            self.target_power = 0
+        if len(data) >= 7:
+            # wind speed: m/s * 1000, grade: percentage * 100,
+            # crr: rolling resistance * 10000, cw: wind resistance * 100
+            wind_speed, grade_raw, crr, cw = _SIM_STRUCT.unpack_from(data, 1)
+            # Store raw grade as percentage (e.g., 4.78 for 4.78%)
+            raw_grade = grade_raw / 100.0
+            # Correct negative grades: Zwift sends negative gradients at ~50% of actual value
+            # So -8% in-game comes as -4% from Zwift - we need to double negative grades
+            self.current_grade = raw_grade * 2.0 if raw_grade < 0 else raw_grade
+            # Store wind speed in m/s
+            self.current_wind_speed = wind_speed / 1000.0
+            logger.info("Zwift SIM mode - Raw Grade: %.2f%%, Corrected: %.2f%%, Wind: %.2fm/s",
+                        raw_grade, self.current_grade, self.current_wind_speed)
+            # Grade and wind will be used in physics-based speed calculation
+            self._send_control_point_response(0x11, 0x01)
+            self._request_update()
+    
     def _send_control_point_response(self, request_opcode: int, result_code: int):
         """Send response to control point command
         
@@ -517,37 +768,57 @@ class VirtualTrainer:
         Request OpCode
         Result Code (0x01 = Success, 0x02 = OpCode Not Supported, etc.)
         """
-        response = struct.pack('<BBB', 0x80, request_opcode, result_code)
-        logger.debug(f"Sending control point response: {response.hex()}")
+        key = request_opcode << 8 | result_code
+        response = self._cp_responses.get(key)
+        if response is None:
+            response = self._cp_responses[key] = _CP_RESP_STRUCT.pack(0x80, request_opcode, result_code)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Queueing control point response: %s", response.hex())
+        
+        # Write callbacks may arrive on a backend thread, so hand the response to the loop safely
+        if self._cp_queue is not None:
+            self._loop.call_soon_threadsafe(self._cp_queue.put_nowait, response)
+    
+    async def _update_value(self, service_uuid: str, char_uuid: str) -> bool:
+        """Notify/indicate subscribers of a characteristic's new value
         
-        # In Bless, we need to update the characteristic value for indication
-        if self.server:
+        update_value is synchronous in bless 0.2.6 (it only emits a D-Bus property
+        change on the event loop); awaiting its result keeps this working if a
+        backend returns a coroutine instead.
+        """
+        result = self._server_update_value(service_uuid, char_uuid)
+        if inspect.isawaitable(result):
+            result = await result
+        if not result:
+            logger.debug("update_value failed for %s", char_uuid)
+        return result
+    
+    def _request_update(self):
+        """Wake update_loop so a new target is broadcast now rather than at the next tick"""
+        if self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+    
+    async def _cp_response_worker(self):
+        """Send queued control point responses in order, one at a time"""
+        while True:
+            response = await self._cp_queue.get()
             try:
+                # In Bless, we need to update the characteristic value for indication
                 # Set the value on the characteristic first
-                self.server.get_characteristic(FITNESS_MACHINE_CONTROL_POINT_UUID).value = response
-                # Then indicate clients of the update (update_value is synchronous)
-                self.server.update_value(
+                self._cp_char.value = response
+                # Then indicate clients of the update
+                await self._update_value(
                     FTMS_SERVICE_UUID,
                     FITNESS_MACHINE_CONTROL_POINT_UUID
                 )
             except Exception as e:
-                logger.error(f"Error sending control point response: {e}")
+                logger.error("Error sending control point response: %s", e)
     
-    def _correct_grade(self, grade: float) -> float:
-        """Correct grade value from Zwift
-        
-        Zwift sends negative gradients at approximately 50% of the actual value.
-        For example, -8% in-game is sent as -4%. We correct by doubling negative grades.
-        
-        Args:
-            grade: Raw grade percentage from Zwift
-        
-        Returns:
-            Corrected grade percentage
-        """
-        if grade < 0:
-            return grade * 2.0
-        return grade
+    def _on_cp_worker_done(self, task: asyncio.Task):
+        """Log the control point response worker stopping on an error, after which
+        Zwift would stop getting responses to its commands"""
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Control point response worker stopped: %r", task.exception())
     
     def _check_can_enter_super_tuck(self) -> bool:
         """Check if conditions are met to ENTER super tuck
@@ -555,10 +826,14 @@ class VirtualTrainer:
         Returns True if speed >= 38mph (61.15 km/h) AND grade <= -8%
         Note: grade is already corrected when stored, so we use current_grade directly
         """
-        speed_ok = self.speed >= self.super_tuck_speed_threshold
-        grade_ok = self.current_grade <= self.super_tuck_grade_threshold_entry
-        logger.debug(f"Super tuck entry check: Speed: {self.speed:.1f}km/h (need >= {self.super_tuck_speed_threshold:.1f}), Grade: {self.current_grade:.2f}% (need <= {self.super_tuck_grade_threshold_entry:.1f}%)")
-        return speed_ok and grade_ok
+        speed = self.speed
+        grade = self.current_grade
+        speed_threshold = self.super_tuck_speed_threshold
+        grade_threshold = self.super_tuck_grade_threshold_entry
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Super tuck entry check: Speed: %.1fkm/h (need >= %.1f), Grade: %.2f%% (need <= %.1f%%)",
+                         speed, speed_threshold, grade, grade_threshold)
+        return speed >= speed_threshold and grade <= grade_threshold
     
     def _check_should_exit_super_tuck(self) -> bool:
         """Check if conditions are met to EXIT super tuck
@@ -566,11 +841,14 @@ class VirtualTrainer:
         Returns True if speed < 38mph (61.15 km/h) OR grade >= -3%
         Note: grade is already corrected when stored, so we use current_grade directly
         """
-        speed_too_low = self.speed < self.super_tuck_speed_threshold
-        grade_too_shallow = self.current_grade >= self.super_tuck_grade_threshold_exit
-        should_exit = speed_too_low or grade_too_shallow
+        speed = self.speed
+        grade = self.current_grade
+        speed_threshold = self.super_tuck_speed_threshold
+        grade_threshold = self.super_tuck_grade_threshold_exit
+        should_exit = speed < speed_threshold or grade >= grade_threshold
         if should_exit:
-            logger.debug(f"Super tuck exit check: Speed: {self.speed:.1f}km/h (need >= {self.super_tuck_speed_threshold:.1f}), Grade: {self.current_grade:.2f}% (need < {self.super_tuck_grade_threshold_exit:.1f}%)")
+            logger.debug("Super tuck exit check: Speed: %.1fkm/h (need >= %.1f), Grade: %.2f%% (need < %.1f%%)",
+                         speed, speed_threshold, grade, grade_threshold)
         return should_exit
     
     def _calculate_bike_speed(self, power: float, grade: float, wind: float = None) -> float:
@@ -587,28 +865,11 @@ class VirtualTrainer:
         if wind is None:
             wind = self.current_wind_speed
         
-        g = 9.81  # Gravitational acceleration (m/s²)
-        theta = math.atan(grade / 100.0)  # Angle in radians
-        m = self.rider_weight  # Mass in kg
-        
-        def equation(v):
-            """Physics equation: power = (aerodynamic + rolling + gravitational) * velocity
-            
-            Note: On descents, fgrav is negative (assisting), so the net force can be negative.
-            This means the rider is accelerating, not at steady state. We solve for the speed
-            where the power output equals the power needed to maintain that speed.
-            """
-            # Ensure velocity is non-negative for calculation
-            v = max(0.0, v)
-            faero = 0.5 * self.rho * self.cda * (v + wind) ** 2
-            froll = self.crr * m * g * math.cos(theta)
-            fgrav = m * g * math.sin(theta)
-            # Net force: positive = opposing motion, negative = assisting motion
-            net_force = faero + froll + fgrav
-            # Power = force * velocity
-            # If net_force is negative (steep descent), we're accelerating
-            # We solve for where power output equals power needed
-            return net_force * v - power
+        # NaN or infinite inputs would only come back as a meaningless speed
+        if not (math.isfinite(power) and math.isfinite(grade) and math.isfinite(wind)):
+            logger.warning("Invalid physics model input: power=%s, grade=%s, wind=%s, using 0 km/h",
+                           power, grade, wind)
+            return 0.0
         
         # Better initial guess based on power and grade
         if power > 0:
@@ -631,52 +892,137 @@ class VirtualTrainer:
         
         v_guess = max(0.1, v_guess)  # Ensure positive initial guess
         
-        try:
-            # Try to solve for positive velocity
-            v_solution = fsolve(equation, v_guess)[0]
-            
-            # If we got a negative solution, it means on this descent the power is too low
-            # to maintain steady state - the rider is accelerating. We need to estimate speed differently.
-            if v_solution < 0:
-                logger.debug(f"Physics model returned negative velocity {v_solution:.2f}m/s for power={power}W, grade={grade}% (accelerating on descent)")
-                # On descent with low power, calculate speed based on power contribution to acceleration
-                # We estimate speed where power contribution + gravity gives reasonable speed
-                if grade < 0 and power > 0:
-                    # On descent: gravity assists, power adds to speed
-                    # Estimate terminal velocity if no power, then add power contribution
-                    # Terminal velocity on descent (no power): roughly proportional to sqrt(abs(grade))
-                    v_terminal_no_power = math.sqrt(abs(grade)) * 8.0  # Rough estimate
-                    # Power adds to speed: more power = faster
-                    v_power_contribution = math.sqrt(power / 20.0)  # Diminishing returns
-                    v_solution = v_terminal_no_power + v_power_contribution
-                    v_solution = max(8.0, v_solution)  # Minimum reasonable speed on descent
-                elif grade < 0:
-                    # Pure descent, no power - terminal velocity
-                    v_solution = math.sqrt(abs(grade)) * 8.0
-                    v_solution = max(5.0, v_solution)
-                else:
-                    # Shouldn't happen on flat/uphill, but fallback
-                    v_solution = max(0.1, power / 100.0)
-            
-            # Convert from m/s to km/h
-            speed_kmh = v_solution * 3.6
-            # Ensure non-negative and reasonable speed (cap at 150 km/h)
-            speed_kmh = max(0.0, min(150.0, speed_kmh))
-            logger.debug(f"Physics model: power={power}W, grade={grade}%, wind={wind}m/s -> v={v_solution:.2f}m/s -> {speed_kmh:.1f}km/h")
-            return speed_kmh
-        except Exception as e:
-            logger.warning(f"Error calculating speed with physics model: {e}, using fallback")
+        v_solution = _solve_speed(power, grade, wind, v_guess,
+                                  self.rho, self.cda, self.crr, self.rider_weight)
+        if v_solution is None:
+            logger.warning("Physics model did not converge for power=%sW, grade=%s%%, wind=%sm/s, using fallback",
+                           power, grade, wind)
             # Fallback to simple calculation if physics model fails
             if power > 0:
                 fallback_speed = 15 + (power / 10)
-                logger.debug(f"Fallback calculation: {fallback_speed:.1f}km/h")
+                logger.debug("Fallback calculation: %.1fkm/h", fallback_speed)
                 return fallback_speed
             elif grade < 0:
                 # Rough estimate for descent
                 fallback_speed = abs(grade) * 7.0  # km/h per % grade
-                logger.debug(f"Fallback descent: {fallback_speed:.1f}km/h")
+                logger.debug("Fallback descent: %.1fkm/h", fallback_speed)
                 return fallback_speed
             return 0.0
+        
+        # If we got a negative solution, it means on this descent the power is too low
+        # to maintain steady state - the rider is accelerating. We need to estimate speed differently.
+        if v_solution < 0:
+            logger.debug("Physics model returned negative velocity %.2fm/s for power=%sW, grade=%s%% (accelerating on descent)",
+                         v_solution, power, grade)
+            # On descent with low power, calculate speed based on power contribution to acceleration
+            # We estimate speed where power contribution + gravity gives reasonable speed
+            if grade < 0 and power > 0:
+                # On descent: gravity assists, power adds to speed
+                # Estimate terminal velocity if no power, then add power contribution
+                # Terminal velocity on descent (no power): roughly proportional to sqrt(abs(grade))
+                v_terminal_no_power = math.sqrt(abs(grade)) * 8.0  # Rough estimate
+                # Power adds to speed: more power = faster
+                v_power_contribution = math.sqrt(power / 20.0)  # Diminishing returns
+                v_solution = v_terminal_no_power + v_power_contribution
+                v_solution = max(8.0, v_solution)  # Minimum reasonable speed on descent
+            elif grade < 0:
+                # Pure descent, no power - terminal velocity
+                v_solution = math.sqrt(abs(grade)) * 8.0
+                v_solution = max(5.0, v_solution)
+            else:
+                # Shouldn't happen on flat/uphill, but fallback
+                v_solution = max(0.1, power / 100.0)
+        
+        # Convert from m/s to km/h
+        speed_kmh = v_solution * 3.6
+        # Ensure non-negative and reasonable speed (cap at 150 km/h)
+        speed_kmh = _clamp(speed_kmh, 0.0, 150.0)
+        logger.debug("Physics model: power=%sW, grade=%s%%, wind=%sm/s -> v=%.2fm/s -> %.1fkm/h",
+                     power, grade, wind, v_solution, speed_kmh)
+        return speed_kmh
+    
+    def calculate_speed_batch(self, powers, grades, winds=None) -> np.ndarray:
+        """Calculate bike speeds for arrays of power and grade in one vectorized solve
+        
+        Uses the same physics model and initial guesses as _calculate_bike_speed, for
+        replaying rides or sweeping parameters without a Python call per point. Points
+        the vectorized solver cannot settle (no convergence or a negative velocity)
+        are recomputed with _calculate_bike_speed so they get its fallbacks.
+        
+        Args:
+            powers: Power in watts (array-like)
+            grades: Grade percentage (array-like, broadcast against powers)
+            winds: Wind speed in m/s (array-like or scalar, defaults to self.current_wind_speed)
+        
+        Returns:
+            NumPy array of speeds in km/h
+        """
+        if winds is None:
+            winds = self.current_wind_speed
+        powers, grades, winds = np.broadcast_arrays(np.asarray(powers, dtype=np.float64),
+                                                    np.asarray(grades, dtype=np.float64),
+                                                    np.asarray(winds, dtype=np.float64))
+        
+        # Initial guesses as in _calculate_bike_speed
+        descending = grades < 0
+        v_guess = np.where(
+            powers > 0,
+            np.where(descending, np.maximum(5.0, np.abs(grades) * 1.5 + powers / 50.0), 5.0 + powers / 100.0),
+            np.where(descending, np.abs(grades) * 3.0, 0.1),
+        )
+        v_guess = np.maximum(0.1, v_guess)
+        
+        v = _solve_speed_batch(powers, grades, winds, v_guess, self.rho, self.cda, self.crr, self.rider_weight)
+        speeds = np.clip(v * 3.6, 0.0, 150.0)
+        
+        for i in np.flatnonzero(~(v >= 0.0)):
+            speeds.flat[i] = self._calculate_bike_speed(float(powers.flat[i]), float(grades.flat[i]),
+                                                        float(winds.flat[i]))
+        return speeds
+    
+    def _next_noise(self, lo: float, hi: float) -> float:
+        """Return a uniform random value in [lo, hi) from the pre-generated noise buffer"""
+        if self._noise_buf is None or self._noise_idx >= NOISE_BUFFER_SIZE:
+            self._noise_buf = self._rng.random(NOISE_BUFFER_SIZE).tolist()
+            self._noise_idx = 0
+        sample = self._noise_buf[self._noise_idx]
+        self._noise_idx += 1
+        return lo + (hi - lo) * sample
+    
+    def clear_speed_cache(self):
+        """Forget all memoized speeds, e.g. after changing rider_weight, cda, crr or rho"""
+        self._speed_luts.clear()
+        self._speed_lut = [None] * (MAX_POWER + 1)
+        self._speed_lut_key = None
+    
+    def _speed_for_power(self, power: float) -> float:
+        """Speed in km/h for `power` at the current grade and wind, via the per-watt lookup table
+        
+        Power is reported to Zwift in whole watts, so the physics model only
+        has to be solved once per watt value for each grade and wind. Tables for
+        the last SPEED_LUT_CACHE_SIZE (grade, wind) pairs are kept.
+        """
+        if 0 < power < 1:
+            # Would truncate to the 0 W entry, which is 0 km/h on flat and uphill grades
+            return float(self._calculate_bike_speed(power, self.current_grade, self.current_wind_speed))
+        
+        key = (self.current_grade, self.current_wind_speed)
+        if key != self._speed_lut_key:
+            lut = self._speed_luts.get(key)
+            if lut is None:
+                if len(self._speed_luts) >= SPEED_LUT_CACHE_SIZE:
+                    # Drop the oldest table (dicts keep insertion order)
+                    del self._speed_luts[next(iter(self._speed_luts))]
+                lut = self._speed_luts[key] = [None] * (MAX_POWER + 1)
+            self._speed_lut = lut
+            self._speed_lut_key = key
+        
+        watts = _clamp(int(power), 0, MAX_POWER)
+        speed = self._speed_lut[watts]
+        if speed is None:
+            speed = float(self._calculate_bike_speed(watts, self.current_grade, self.current_wind_speed))
+            self._speed_lut[watts] = speed
+        return speed
     
     def simulate_realistic_data(self):
         """Simulate realistic cycling data with variations"""
@@ -689,11 +1035,8 @@ class VirtualTrainer:
             self.is_super_tuck = False
             return
         
+        # Power and cadence are worked out in locals and stored once, after the range clamp
         # Calculate power FIRST (needed to calculate speed accurately)
-        # Calculate grade multiplier: 1 + (4 * grade / 100)
-        # Example: 10% grade → 1.4x, -10% grade → 0.6x
-        grade_multiplier = 1.0 + (4.0 * self.current_grade / 100.0)
-        
         if self.erg_mode_enabled and self.target_power > 0:
             # In ERG mode: no gradient effect, 3% variance, no super tucks, no coasting
             # Use target power directly (no grade multiplier, no base_power influence)
@@ -701,74 +1044,85 @@ class VirtualTrainer:
             base_erg_power = self.target_power
             # Apply 3% variance in ERG mode
             variance_amount = base_erg_power * 0.03  # 3% variance
-            self.power = base_erg_power + random.uniform(-variance_amount, variance_amount)
-            # Ensure power never goes to 0 in ERG mode (unless target is 0)
-            self.power = max(0, min(2000, self.power))
-            if self.target_power > 0 and self.power < 1:
-                self.power = 1  # Minimum 1W to prevent coasting
+            power = base_erg_power + self._next_noise(-variance_amount, variance_amount)
+            # Ensure power never goes to 0 in ERG mode (the range clamp below keeps it at >= 1W)
+            if power < 1:
+                power = 1  # Minimum 1W to prevent coasting
             
             # Cadence adjusts naturally with power in ERG mode
-            self.cadence = self.base_cadence + random.uniform(-self.cadence_variation, self.cadence_variation)
+            cadence = self.base_cadence + self._next_noise(-self.cadence_variation, self.cadence_variation)
             
             # Exit super tuck if we're in it when ERG mode is active
             if self.is_super_tuck:
                 self.is_super_tuck = False
-                logger.info(f"🚴 Super tuck disabled in ERG mode. Restoring power.")
+                logger.info("🚴 Super tuck disabled in ERG mode. Restoring power.")
         elif self.power_variance_level == 'exact':
             # Exact mode - no variance, just use the base power
-            self.power = self.base_power
-            self.cadence = self.base_cadence
-            self.speed = self._calculate_bike_speed(self.power, self.current_grade, self.current_wind_speed)
+            power = self.base_power
+            cadence = self.base_cadence
             self.is_super_tuck = False
-            logger.info(f"🚴 Exact mode - power: {self.power:.1f}W, cadence: {self.cadence:.1f}rpm, speed: {self.speed:.1f}km/h")
+            logger.info("🚴 Exact mode - power: %.1fW, cadence: %.1frpm, speed: %.1fkm/h",
+                        power, cadence, self._speed_for_power(power))
         else:
             # Normal mode - apply grade multiplier to base power, then add variance
             # If ERG mode is enabled but target_power is 0, exit super tuck
             if self.erg_mode_enabled and self.is_super_tuck:
                 self.is_super_tuck = False
-                logger.info(f"🚴 Super tuck disabled in ERG mode (target power is 0).")
+                logger.info("🚴 Super tuck disabled in ERG mode (target power is 0).")
             
             if self.base_power > 0:
+                # Calculate grade multiplier: 1 + (4 * grade / 100)
+                # Example: 10% grade → 1.4x, -10% grade → 0.6x
+                grade_multiplier = 1.0 + (4.0 * self.current_grade / 100.0)
                 # Apply grade multiplier: base_power * (1 + 4 * grade / 100)
                 effective_base_power = self.base_power * grade_multiplier
                 # Then apply variance to the adjusted power
                 variance_amount = effective_base_power * self.power_variance_percent
-                self.power = effective_base_power + random.uniform(-variance_amount, variance_amount)
-                logger.debug(f"Power calculation: base={self.base_power}W, grade_mult={grade_multiplier:.2f}, effective={effective_base_power:.1f}W, final={self.power:.1f}W")
+                power = effective_base_power + self._next_noise(-variance_amount, variance_amount)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Power calculation: base=%sW, grade_mult=%.2f, effective=%.1fW, final=%.1fW",
+                                 self.base_power, grade_multiplier, effective_base_power, power)
             else:
-                self.power = 0
-                logger.debug(f"Power is 0 because base_power is 0")
-            self.cadence = self.base_cadence + random.uniform(-self.cadence_variation, self.cadence_variation)
+                power = 0
+                logger.debug("Power is 0 because base_power is 0")
+            cadence = self.base_cadence + self._next_noise(-self.cadence_variation, self.cadence_variation)
         
         # Ensure values stay in realistic ranges
-        self.power = max(0, min(2000, self.power))
-        self.cadence = max(0, min(200, self.cadence))
+        power = _clamp(power, 0, MAX_POWER)
+        self.power = power
+        self.cadence = _clamp(cadence, 0, 200)
         
         # Calculate speed from the NEW power value using physics model
-        if self.power > 0:
-            calculated_speed = self._calculate_bike_speed(self.power, self.current_grade, self.current_wind_speed)
+        if power > 0:
+            calculated_speed = self._speed_for_power(power)
             if calculated_speed > 0:
                 self.speed = calculated_speed
-                logger.debug(f"Speed calculation: power={self.power:.1f}W, grade={self.current_grade:.2f}%, wind={self.current_wind_speed:.2f}m/s -> speed={self.speed:.1f}km/h")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Speed calculation: power=%.1fW, grade=%.2f%%, wind=%.2fm/s -> speed=%.1fkm/h",
+                                 power, self.current_grade, self.current_wind_speed, calculated_speed)
             else:
                 # Physics model returned 0 or negative - use fallback
-                logger.warning(f"Physics model returned {calculated_speed:.1f}km/h for power={self.power:.1f}W, using fallback")
-                self.speed = 15 + (self.power / 10)  # Simple fallback
+                logger.warning("Physics model returned %.1fkm/h for power=%.1fW, using fallback",
+                               calculated_speed, power)
+                self.speed = 15 + (power / 10)  # Simple fallback
         else:
             self.speed = 0
             if not self.is_stopped:
-                logger.info(f"Speed is 0 because power is 0 (base_power={self.base_power}, erg_mode={self.erg_mode_enabled}, target_power={self.target_power})")
+                logger.info("Speed is 0 because power is 0 (base_power=%s, erg_mode=%s, target_power=%s)",
+                            self.base_power, self.erg_mode_enabled, self.target_power)
         
-        # Check super tuck conditions with hysteresis (different thresholds for entry vs exit)
+        # Check super tuck conditions with hysteresis (different thresholds for entry vs exit).
+        # Same tests as _check_can_enter_super_tuck/_check_should_exit_super_tuck, inline
         # Skip super tuck checks in ERG mode (no super tucks allowed)
         if not self.erg_mode_enabled:
+            speed = self.speed
+            grade = self.current_grade
             if self.is_super_tuck:
-                # Already in super tuck - check if we should exit
-                should_exit = self._check_should_exit_super_tuck()
-                if should_exit:
+                # Already in super tuck - exit if speed < threshold OR grade >= exit threshold
+                if speed < self.super_tuck_speed_threshold or grade >= self.super_tuck_grade_threshold_exit:
                     # Exiting super tuck - restore base power
                     self.base_power = self.pre_super_tuck_base_power
-                    logger.info(f"🚴 Super tuck disengaged. Speed: {self.speed:.1f} km/h, Grade: {self.current_grade:.1f}%")
+                    logger.info("🚴 Super tuck disengaged. Speed: %.1f km/h, Grade: %.1f%%", speed, grade)
                     self.is_super_tuck = False
                 else:
                     # Maintain super tuck - set power and cadence to 0
@@ -777,16 +1131,15 @@ class VirtualTrainer:
                     
                     # During super tuck, calculate speed with power=0 using physics model
                     # This simulates coasting down a descent - speed will increase on negative grades
-                    self.speed = self._calculate_bike_speed(0.0, self.current_grade, self.current_wind_speed)
+                    self.speed = self._speed_for_power(0)
                     self.super_tuck_speed = self.speed  # Update stored speed
             else:
-                # Not in super tuck - check if we can enter
-                can_enter = self._check_can_enter_super_tuck()
-                if can_enter:
+                # Not in super tuck - enter if speed >= threshold AND grade <= entry threshold
+                if speed >= self.super_tuck_speed_threshold and grade <= self.super_tuck_grade_threshold_entry:
                     # Entering super tuck - save current base power and speed
                     self.pre_super_tuck_base_power = self.base_power
                     self.super_tuck_speed = self.speed
-                    logger.info(f"🏎️  Super tuck engaged! Speed: {self.speed:.1f} km/h, Grade: {self.current_grade:.1f}%")
+                    logger.info("🏎️  Super tuck engaged! Speed: %.1f km/h, Grade: %.1f%%", speed, grade)
                     self.is_super_tuck = True
                     # Set power and cadence to 0 during super tuck
                     self.power = 0
@@ -794,9 +1147,39 @@ class VirtualTrainer:
                     
                     # During super tuck, calculate speed with power=0 using physics model
                     # This simulates coasting down a descent - speed will increase on negative grades
-                    self.speed = self._calculate_bike_speed(0.0, self.current_grade, self.current_wind_speed)
+                    self.speed = self._speed_for_power(0)
                     self.super_tuck_speed = self.speed  # Update stored speed
     
+    def _record_history(self):
+        """Append the current values to the telemetry history (called by update_loop)"""
+        i = self._hist_i
+        self._hist[i] = (self.power, self.cadence, self.speed, self.current_grade, self.current_wind_speed)
+        self._hist_i = (i + 1) % HISTORY_SIZE
+        if self._hist_count < HISTORY_SIZE:
+            self._hist_count += 1
+    
+    def telemetry_history(self, n: Optional[int] = None) -> np.ndarray:
+        """Return the last n scheduled update ticks, oldest first
+        
+        Rows are UPDATE_INTERVAL seconds apart while the trainer is running; ticks
+        while stopped are not recorded.
+        
+        Args:
+            n: Number of ticks (defaults to all kept, at most HISTORY_SIZE)
+        
+        Returns:
+            float32 NumPy array of shape (n, len(HISTORY_COLUMNS)), a copy
+        """
+        count = self._hist_count
+        n = count if n is None else max(0, min(n, count))
+        # Negative row indices wrap around to the end of the ring buffer
+        return self._hist[np.arange(self._hist_i - n, self._hist_i)]
+    
+    def rolling_power_avg(self, n: int) -> float:
+        """Average power in watts over the last n scheduled ticks, i.e. about the last
+        n * UPDATE_INTERVAL seconds of riding (0.0 with no history)"""
+        powers = self.telemetry_history(n)[:, 0]
+        return float(powers.mean(dtype=np.float64)) if len(powers) else 0.0
     
     def start_power(self):
         """Start trainer - clears stopped state but keeps power at 0 until updated"""
@@ -817,8 +1200,8 @@ class VirtualTrainer:
             new_power: Power in watts (0-2000)
             variance_level: Optional variance level ('chill', 'focused', 'standard')
         """
-        if new_power < 0 or new_power > 2000:
-            logger.warning(f"⚠️  Power must be between 0 and 2000W. Got {new_power}W")
+        if new_power < 0 or new_power > MAX_POWER:
+            logger.warning(f"⚠️  Power must be between 0 and {MAX_POWER}W. Got {new_power}W")
             return
         # If updating to 0, treat it as stop
         if new_power == 0:
@@ -861,8 +1244,8 @@ class VirtualTrainer:
         self.speed = 0
         logger.info("🛑 Stopped: Power and cadence set to 0W/0rpm (no fluctuations)")
     
-    def _keyboard_input_handler(self):
-        """Handle keyboard input in a separate thread"""
+    def _print_keyboard_help(self):
+        """Print the keyboard controls"""
         print("\n" + "=" * 60)
         print("⌨️  KEYBOARD CONTROLS:")
         print("  's' or 'start'  - Start trainer (enables, stays at 0W)")
@@ -871,36 +1254,85 @@ class VirtualTrainer:
         print("  'stop'           - Stop trainer (→ 0W/0rpm, no variations)")
         print("  'q' or 'quit'    - Quit trainer")
         print("=" * 60 + "\n")
+    
+    def _handle_keyboard_command(self, line: str) -> bool:
+        """Run one keyboard command; returns False when the user asked to quit"""
+        line = line.strip().lower()
         
+        if line in ['s', 'start']:
+            self.start_power()
+        elif line.startswith('u '):
+            try:
+                parts = line.split()
+                watts = int(parts[1])
+                # Check if variance level is provided (3rd argument)
+                variance_level = parts[2] if len(parts) > 2 else None
+                self.update_power(watts, variance_level)
+            except (IndexError, ValueError):
+                print("⚠️  Usage: 'u <watts> [variance]' (e.g., 'u 200' or 'u 200 chill')")
+                print("          Variance: 'chill' (15%), 'focused' (5%), 'standard' (10%)")
+        elif line == 'stop':
+            self.stop_power()
+        elif line in ['q', 'quit', 'exit']:
+            print("\n🛑 Shutting down...")
+            return False
+        else:
+            print(f"⚠️  Unknown command: '{line}'. Type 's' to start, 'u <watts>' to update, 'stop' to stop.")
+        return True
+    
+    def _on_stdin_ready(self):
+        """Read and run keyboard commands when stdin becomes readable (runs on the event loop)"""
+        # Read the raw fd: sys.stdin's own buffer could hold lines the loop never wakes up for
+        fd = sys.stdin.fileno()
+        data = os.read(fd, 4096)
+        if not data:
+            # EOF (e.g. stdin is not a terminal) - stop watching it
+            self._loop.remove_reader(fd)
+            return
+        
+        *lines, self._stdin_partial = (self._stdin_partial + data).split(b'\n')
+        for line in lines:
+            try:
+                if not self._handle_keyboard_command(line.decode(errors='replace')):
+                    self._quit.set()
+                    self._loop.remove_reader(fd)
+                    return
+            except Exception as e:
+                logger.error(f"Error in keyboard handler: {e}")
+    
+    def _keyboard_input_handler(self):
+        """Handle keyboard input in a separate thread
+        
+        Only used where the event loop cannot watch stdin (e.g. the Windows
+        proactor loop); commands are handed to the loop to run.
+        """
         while True:
             try:
-                line = input().strip().lower()
-                
-                if line in ['s', 'start']:
-                    self.start_power()
-                elif line.startswith('u '):
-                    try:
-                        parts = line.split()
-                        watts = int(parts[1])
-                        # Check if variance level is provided (3rd argument)
-                        variance_level = parts[2] if len(parts) > 2 else None
-                        self.update_power(watts, variance_level)
-                    except (IndexError, ValueError):
-                        print("⚠️  Usage: 'u <watts> [variance]' (e.g., 'u 200' or 'u 200 chill')")
-                        print("          Variance: 'chill' (15%), 'focused' (5%), 'standard' (10%)")
-                elif line == 'stop':
-                    self.stop_power()
-                elif line in ['q', 'quit', 'exit']:
-                    print("\n🛑 Shutting down...")
-                    # Signal shutdown by setting a flag or using os._exit
-                    import os
-                    os._exit(0)
-                else:
-                    print(f"⚠️  Unknown command: '{line}'. Type 's' to start, 'u <watts>' to update, 'stop' to stop.")
+                line = input()
             except EOFError:
                 break
-            except Exception as e:
-                logger.error(f"Error in keyboard handler: {e}")
+            future = asyncio.run_coroutine_threadsafe(self._run_keyboard_command(line), self._loop)
+            if not future.result():
+                break
+    
+    async def _run_keyboard_command(self, line: str) -> bool:
+        """Run a keyboard command from the input thread on the event loop"""
+        try:
+            if not self._handle_keyboard_command(line):
+                self._quit.set()
+                return False
+        except Exception as e:
+            logger.error(f"Error in keyboard handler: {e}")
+        return True
+    
+    def _start_keyboard_input(self):
+        """Watch stdin for keyboard commands on the event loop, falling back to a thread"""
+        self._print_keyboard_help()
+        try:
+            self._loop.add_reader(sys.stdin.fileno(), self._on_stdin_ready)
+        except (NotImplementedError, ValueError, OSError):
+            keyboard_thread = threading.Thread(target=self._keyboard_input_handler, daemon=True)
+            keyboard_thread.start()
     
     async def start_advertising(self):
         """Start BLE advertising"""
@@ -908,49 +1340,105 @@ class VirtualTrainer:
         await self.server.start()
         logger.info("✓ BLE advertising started - Zwift should now see the trainer")
     
+    def _frame_changed(self, char_uuid: str, frame: bytes, now: float) -> bool:
+        """Return True if `frame` should be notified: it differs from the last one sent
+        or the last send was NOTIFY_KEEPALIVE seconds ago. Records it as sent."""
+        last = self._last_sent.get(char_uuid)
+        if last is not None and last[0] == frame and now - last[1] < NOTIFY_KEEPALIVE:
+            return False
+        self._last_sent[char_uuid] = (bytes(frame), now)
+        return True
+    
+    async def _stop_server(self):
+        """Stop the BLE server and drop the cached characteristics"""
+        await self.server.stop()
+        self._bike_char = None
+        self._power_char = None
+        self._cp_char = None
+    
     async def update_loop(self):
         """Main loop to update and broadcast trainer data"""
         logger.info("Starting data update loop")
         
+        # Ticks are scheduled against fixed deadlines so the time spent in each
+        # update does not add up to drift
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        
+        # Set once a tick has run while stopped; the zeroed frames are then
+        # still in the encode buffers and only need the occasional keep-alive
+        idle = False
+        
         while True:
+            # Changes made after this point wake the loop again for another update
+            if self._wake is not None:
+                self._wake.clear()
+            
+            simulated = False
             try:
-                # Simulate realistic data
-                self.simulate_realistic_data()
+                tick_time = loop.time()
+                
+                if idle and self.is_stopped:
+                    # Stopped: nothing to simulate, re-send the last (zero) frames as keep-alives
+                    bike_data = self._bike_buf
+                    power_data = self._power_buf
+                else:
+                    # Simulate realistic data and encode both frames
+                    self.simulate_realistic_data()
+                    bike_data = self._encode_indoor_bike_data()
+                    power_data = self._encode_cycling_power_measurement()
+                    idle = self.is_stopped
+                    simulated = not idle
                 
-                # Encode and send Indoor Bike Data
-                bike_data = self._encode_indoor_bike_data()
+                # Send Indoor Bike Data (skipped if unchanged since the last send)
                 
-                if self.server and self.server.get_characteristic(INDOOR_BIKE_DATA_UUID):
+                if self._frame_changed(INDOOR_BIKE_DATA_UUID, bike_data, tick_time):
                     # Set the value on the characteristic first
-                    self.server.get_characteristic(INDOOR_BIKE_DATA_UUID).value = bike_data
+                    self._bike_char.value = bike_data
                     # Then notify clients of the update
-                    self.server.update_value(
+                    await self._update_value(
                         FTMS_SERVICE_UUID,
                         INDOOR_BIKE_DATA_UUID
                     )
                 
-                # Encode and send Cycling Power Measurement
-                power_data = self._encode_cycling_power_measurement()
-                
-                if self.server and self.server.get_characteristic(CYCLING_POWER_MEASUREMENT_UUID):
+                # Send Cycling Power Measurement (skipped if unchanged since the last send)
+                if self._frame_changed(CYCLING_POWER_MEASUREMENT_UUID, power_data, tick_time):
                     # Set the value on the characteristic first
-                    self.server.get_characteristic(CYCLING_POWER_MEASUREMENT_UUID).value = power_data
+                    self._power_char.value = power_data
                     # Then notify clients of the update
-                    self.server.update_value(
+                    await self._update_value(
                         CYCLING_POWER_SERVICE_UUID,
                         CYCLING_POWER_MEASUREMENT_UUID
                     )
                     
-                    logger.debug(f"Broadcasting - Power: {self.power:.1f}W, "
-                               f"Cadence: {self.cadence:.1f}rpm, "
-                               f"Speed: {self.speed:.1f}km/h")
-                
-                # Update every 1 second (1 Hz is typical for trainers)
-                await asyncio.sleep(1.0)
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("Broadcasting - Power: %.1fW, Cadence: %.1frpm, Speed: %.1fkm/h",
+                                     self.power, self.cadence, self.speed)
                 
             except Exception as e:
-                logger.error(f"Error in update loop: {e}")
-                await asyncio.sleep(1.0)
+                logger.error("Error in update loop: %s", e)
+            
+            # Schedule the next tick (an early update from _request_update keeps the current one)
+            now = loop.time()
+            if now >= deadline:
+                # Only scheduled ticks go into the telemetry history, one row per UPDATE_INTERVAL
+                if simulated:
+                    self._record_history()
+                deadline += UPDATE_INTERVAL
+                if deadline < now - UPDATE_INTERVAL:
+                    # Fell more than a whole tick behind (e.g. the host stalled) - re-sync instead of bursting
+                    logger.warning("Update loop fell %.1fs behind schedule - re-syncing", now - deadline)
+                    deadline = now + UPDATE_INTERVAL
+            
+            # Sleep until the next tick, or until a control point command changes the target
+            delay = max(0.0, deadline - now)
+            if self._wake is None:
+                await asyncio.sleep(delay)
+            else:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
     
     async def run(self):
         """Main entry point - setup and run the virtual trainer"""
@@ -969,20 +1457,29 @@ class VirtualTrainer:
             logger.info("⚡ Broadcasting power and cadence data...")
             logger.info("")
             
-            # Start keyboard input handler in a separate thread
-            keyboard_thread = threading.Thread(target=self._keyboard_input_handler, daemon=True)
-            keyboard_thread.start()
+            # Keyboard commands are read on the event loop, so they never race the update loop
+            self._quit = asyncio.Event()
+            self._start_keyboard_input()
             
             logger.info("Press Ctrl+C to stop")
             logger.info("=" * 60)
             
-            # Run update loop
-            await self.update_loop()
+            # Run update loop until the user quits
+            update_task = asyncio.create_task(self.update_loop())
+            quit_task = asyncio.create_task(self._quit.wait())
+            await asyncio.wait({update_task, quit_task}, return_when=asyncio.FIRST_COMPLETED)
+            for task in (update_task, quit_task, self._cp_worker_task):
+                task.cancel()
+            if update_task.done() and not update_task.cancelled():
+                update_task.result()  # Re-raise an unexpected update loop failure
+            
+            await self._stop_server()
+            logger.info("✓ Stopped")
             
         except KeyboardInterrupt:
             logger.info("\n\nShutting down virtual trainer...")
             if self.server:
-                await self.server.stop()
+                await self._stop_server()
             logger.info("✓ Stopped")
         except Exception as e:
             logger.error(f"Error running virtual trainer: {e}")
@@ -1000,6 +1497,8 @@ async def main():
                       help='Base power in watts (default: 150)')
     parser.add_argument('--cadence', type=int, default=85,
                       help='Base cadence in RPM (default: 85)')
+    parser.add_argument('--seed', type=int, default=None,
+                      help='Random seed for power/cadence variance (default: random)')
     parser.add_argument('--debug', action='store_true',
                       help='Enable debug logging')
     
@@ -1008,7 +1507,7 @@ async def main():
     if args.debug:
         logging.getLogger().setLevel(logging.DEBUG)
     
-    trainer = VirtualTrainer(name=args.name)
+    trainer = VirtualTrainer(name=args.name, seed=args.seed)
     trainer.base_power = args.power
     trainer.base_cadence = args.cadence
     
@@ -1016,5 +1515,9 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # --debug keeps the default loop, whose tracebacks and debug hooks are more useful
+    if uvloop is not None and '--debug' not in sys.argv[1:]:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
 